@@ -8,14 +8,18 @@ MQTT-TCP桥接服务器
 import os
 import sys
 import time
+import atexit
 import json
 import yaml
 import socket
+import struct
 import threading
 import logging
+import logging.handlers
+import queue
 import psutil
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from concurrent.futures import ThreadPoolExecutor
 
 # 添加当前目录到Python路径
@@ -40,18 +44,97 @@ except ImportError as e:
     print(f"导入TCP模块失败: {e}")
     TCP_MODULES_AVAILABLE = False
 
+# MQTT与TCP收发使用的JSON编解码：直接产出/接受UTF-8字节，paho可直接发布字节载荷
+from tcp._json_backend import dumps_bytes as _json_dumps_bytes, loads as _json_loads
+# VDA5050消息的时间戳（本地时间，微秒精度，带'Z'后缀）
+from tcp._timestamp import local_now_iso_z as _message_timestamp
 
 
-# 配置日志 - 只输出到文件，避免干扰动态显示
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/vda5050_server.log', encoding='utf-8')
-    ]
-)
+class _CachedTimeFormatter(logging.Formatter):
+    """同一秒内的日志记录复用已格式化的时间字符串，只补充毫秒部分"""
+    
+    def __init__(self, fmt: Optional[str] = None):
+        super().__init__(fmt)
+        self._last_sec = -1
+        self._last_str = ""
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_str = time.strftime(self.default_time_format, self.converter(record.created))
+            self._last_sec = sec
+        return self.default_msec_format % (self._last_str, record.msecs)
+
+
+# 日志格式不包含线程、进程和调用位置信息，创建日志记录时跳过这些字段的采集
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging._srcfile = None
+
 logger = logging.getLogger(__name__)
 
+# 日志文件目录与路径
+LOG_DIR = 'logs'
+LOG_FILE = os.path.join(LOG_DIR, 'vda5050_server.log')
+
+
+def _setup_logging() -> logging.handlers.QueueListener:
+    """配置日志 - 只输出到文件，避免干扰动态显示
+    
+    调用方（包括MQTT网络线程）只把日志记录放入队列，文件写入由后台监听线程完成。
+    由main()调用，导入本模块时不创建日志文件也不启动线程
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    
+    # delay=True：首条日志写出时才打开文件
+    file_handler = logging.FileHandler(LOG_FILE, encoding='utf-8', delay=True)
+    file_handler.setFormatter(_CachedTimeFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # 入队前只合并消息文本，时间、级别等格式由文件处理器统一添加
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    # 进程退出时停止监听线程，确保队列中剩余的日志全部写出
+    atexit.register(listener.stop)
+    
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+    return listener
+
+# 只读的空字典，用于替代.get(key, {})链式调用中每次新建的默认值
+_EMPTY_DICT: Dict[str, Any] = {}
+# 只读的空序列，作为消息中缺省数组字段的默认值，序列化结果与空列表相同（[]）
+_EMPTY_TUPLE: Tuple[Any, ...] = ()
+
+# TCP数据包头（16字节）：同步头(1B) + 版本(1B) + 序列号(2B) + 数据长度(4B) + 消息类型(2B) + 保留字段(6B)
+_PACKET_HEADER = struct.Struct('>BBHIH6s')
+
+
+def _parse_cpu_cores(value: str) -> frozenset:
+    """解析逗号分隔的CPU核心编号，格式错误时返回空集合（即不绑定）"""
+    try:
+        return frozenset(int(core) for core in value.split(',') if core.strip())
+    except ValueError:
+        print(f"警告: 无效的MQTT_NET_CORES配置: {value}")
+        return frozenset()
+
+
+# MQTT网络线程绑定的CPU核心，例如 MQTT_NET_CORES=2,3；未设置或平台不支持时不做绑定
+MQTT_NET_CORES = _parse_cpu_cores(os.environ.get('MQTT_NET_CORES', ''))
+
+# VDA5050协议版本
+VDA5050_VERSION = "2.0.0"
+# 订阅的VDA5050下行主题（所有AGV的order和instantActions）
+VDA5050_SUBSCRIBE_TOPICS = (
+    "uagv/v2/+/+/order",
+    "uagv/v2/+/+/instantActions"
+)
+# 桥接服务发布的VDA5050上行消息类型（主题最后一级）
+VDA5050_PUBLISH_TOPIC_TYPES = ("state", "connection", "factsheet", "visualization")
+
+
 class DynamicTableDisplay:
     """动态表格显示类 - 在控制台中实时显示AGV状态"""
     
@@ -60,6 +143,7 @@ class DynamicTableDisplay:
         self.display_thread = None
         self.last_update_time = 0
         self.update_interval = 2.0  # 更新间隔（秒）
+        self._stop_event = threading.Event()  # 停止信号，用于打断刷新间隔的等待
         
         # 控制台控制
         self.clear_command = 'cls' if os.name == 'nt' else 'clear'
@@ -71,6 +155,7 @@ class DynamicTableDisplay:
         self.tcp_manager = tcp_manager
         self.mqtt_client = mqtt_client
         self.is_running = True
+        self._stop_event.clear()
         
         self.display_thread = threading.Thread(target=self._display_loop, daemon=True)
         self.display_thread.start()
@@ -78,6 +163,7 @@ class DynamicTableDisplay:
     def stop_display(self):
         """停止动态显示"""
         self.is_running = False
+        self._stop_event.set()
         if self.display_thread:
             self.display_thread.join(timeout=1.0)
             
@@ -85,13 +171,14 @@ class DynamicTableDisplay:
         """显示循环"""
         while self.is_running:
             try:
-                current_time = time.time()
-                if current_time - self.last_update_time >= self.update_interval:
-                    self._update_display()
-                    self.last_update_time = current_time
-                time.sleep(0.1)
+                self._update_display()
             except Exception as e:
                 logger.error(f"显示循环错误: {e}")
+            self.last_update_time = time.time()
+            
+            # 等待到下一次刷新，停止时立即唤醒
+            if self._stop_event.wait(self.update_interval):
+                break
                 
     def _update_display(self):
         """更新显示内容"""
@@ -302,6 +389,10 @@ class DynamicTableDisplay:
 class TCPClientManager:
     """TCP客户端管理器 - 主动连接到AGV"""
     
+    # vda5050_server由VDA5050Server.set_tcp_manager设置，设置前按未定义处理（hasattr为False）
+    __slots__ = ('connections', 'is_running', 'all_agv_configs', 'failed_agvs', 'reconnect_threads',
+                 'polling_thread', '_stop_event', 'data_buffers', 'vda5050_server')
+    
     def __init__(self):
         self.connections = {}  # {agv_id: {port: socket}}
         self.is_running = False
@@ -309,6 +400,7 @@ class TCPClientManager:
         self.failed_agvs = []  # 连接失败的AGV列表
         self.reconnect_threads = {}
         self.polling_thread = None
+        self._stop_event = threading.Event()  # 停止信号，用于打断重连轮询的等待
         
         # 数据缓冲区 - 用于处理TCP粘包问题
         self.data_buffers = {}  # {agv_id: {port: bytes}}
@@ -386,6 +478,7 @@ class TCPClientManager:
     def start(self):
         """启动TCP客户端管理器"""
         self.is_running = True
+        self._stop_event.clear()
         
         # 尝试连接所有AGV
         self._connect_all_agvs()
@@ -399,6 +492,7 @@ class TCPClientManager:
     def stop(self):
         """停止TCP客户端管理器"""
         self.is_running = False
+        self._stop_event.set()
         
         # 停止所有连接
         for agv_id in list(self.connections.keys()):
@@ -533,12 +627,14 @@ class TCPClientManager:
                             if success:
                                 logger.info(f"AGV {agv_id} 重连成功")
                 
-                # 等待30秒后再次尝试
-                time.sleep(30)
+                # 等待30秒后再次尝试，停止时立即退出
+                if self._stop_event.wait(30):
+                    break
                 
             except Exception as e:
                 logger.error(f"重连轮询错误: {e}")
-                time.sleep(5)
+                if self._stop_event.wait(5):
+                    break
     
     def _receive_data(self, agv_id: str, port: int, sock: socket.socket):
         """接收AGV数据"""
@@ -616,11 +712,7 @@ class TCPClientManager:
                 try:
                     # 解析数据包头部（按照虚拟AGV的协议格式）
                     # 格式：同步头(1B) + 版本(1B) + 序列号(2B) + 数据长度(4B) + 消息类型(2B) + 保留字段(6B)
-                    sync_header = buffer[0]
-                    version = buffer[1]
-                    sequence = int.from_bytes(buffer[2:4], byteorder='big')
-                    data_length = int.from_bytes(buffer[4:8], byteorder='big')
-                    message_type = int.from_bytes(buffer[8:10], byteorder='big')
+                    sync_header, version, sequence, data_length, message_type, _ = _PACKET_HEADER.unpack_from(buffer)
                     
                     # 验证数据长度是否合理 (1-100KB)
                     if data_length < 1 or data_length > 100000:
@@ -668,7 +760,8 @@ class TCPClientManager:
             message_type = packet_info['message_type']
             raw_data = packet_info['data']
             
-            logger.debug(f"处理完整数据包 AGV {agv_id}:{port} - 同步头:0x{sync_header:02X}, 长度:{data_length}, 类型:{message_type}")
+            logger.debug("处理完整数据包 AGV %s:%s - 同步头:0x%02X, 长度:%s, 类型:%s",
+                         agv_id, port, sync_header, data_length, message_type)
             
             # 根据端口类型处理数据
             if port == 19301:  # 状态上报端口
@@ -693,35 +786,39 @@ class TCPClientManager:
             # data参数已经是从TCP包中提取出来的payload数据（不包含包头）
             # 尝试将payload解析为JSON
             try:
-                json_str = data.decode('utf-8')
-                json_data = json.loads(json_str)
+                json_data = _json_loads(data)
                 
-                logger.info(f"成功解析AGV {agv_id} 状态JSON数据")
-                logger.info(f"AGV {agv_id} 状态数据: {json_data}")
+                logger.info("成功解析AGV %s 状态JSON数据", agv_id)
+                # 完整状态内容仅在DEBUG级别输出，避免每个状态包都把整个字典再格式化一遍
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("AGV %s 状态数据: %s", agv_id, json_data)
                 
                 # 转换为VDA5050格式并发布
                 if hasattr(self, 'vda5050_server') and self.vda5050_server:
                     vda5050_data = self._convert_huaqing_to_vda5050(json_data, agv_id)
-                    self.vda5050_server.publish_state_message(agv_id, vda5050_data)
-                    # 同时发布可视化数据
                     if 'position' in json_data or 'agv_position' in json_data:
-                        self.vda5050_server.publish_visualization_message(agv_id, vda5050_data)
+                        # 有位置数据时同时发布可视化数据，两条消息一起发布
+                        self.vda5050_server.publish_state_and_visualization_messages(agv_id, vda5050_data)
+                    else:
+                        self.vda5050_server.publish_state_message(agv_id, vda5050_data)
                         
             except (UnicodeDecodeError, json.JSONDecodeError) as e:
                 # 如果无法解析为JSON，尝试其他格式
                 logger.warning(f"AGV {agv_id} 状态数据不是有效的JSON: {e}")
-                logger.debug(f"原始数据: {data.hex()}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("原始数据: %s", data.hex())
                 
                 # 尝试解析为文本
                 try:
                     text_str = data.decode('utf-8', errors='ignore')
-                    logger.info(f"AGV {agv_id} 状态文本数据: {text_str}")
+                    logger.info("AGV %s 状态文本数据: %s", agv_id, text_str)
                 except Exception as text_e:
                     logger.warning(f"AGV {agv_id} 状态数据无法解析为文本: {text_e}")
                     
         except Exception as e:
             logger.error(f"处理状态数据失败: {e}")
-            logger.debug(f"原始数据: {data.hex()}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("原始数据: %s", data.hex())
     
     def _process_relocation_data(self, agv_id: str, data: bytes):
         """处理重定位数据"""
@@ -743,8 +840,8 @@ class TCPClientManager:
         """将HUAQING AGV数据转换为VDA5050格式"""
         try:
             # 获取AGV配置
-            agv_config = self.all_agv_configs.get(agv_id, {})
-            robot_info = agv_config.get('robot_info', {})
+            agv_config = self.all_agv_configs.get(agv_id) or _EMPTY_DICT
+            robot_info = agv_config.get('robot_info') or _EMPTY_DICT
             
             # 基础VDA5050状态数据
             vda5050_data = {
@@ -846,11 +943,10 @@ class TCPClientManager:
                 
                 # 发送二进制数据包
                 sock.send(tcp_message)
-                logger.debug(f"发送TCP数据包到AGV {agv_id}:{port} (类型:{message_type:02X}): {len(tcp_message)}字节")
+                logger.debug("发送TCP数据包到AGV %s:%s (类型:%02X): %s字节", agv_id, port, message_type, len(tcp_message))
             else:
                 # 降级处理：直接发送JSON
-                json_data = json.dumps(data, ensure_ascii=False)
-                packet = json_data.encode('utf-8')
+                packet = _json_dumps_bytes(data)
                 sock.send(packet)
                 logger.warning(f"TCP模块不可用，直接发送JSON到AGV {agv_id}:{port}")
             
@@ -883,12 +979,11 @@ class TCPClientManager:
                 
                 # 发送二进制数据包
                 sock.send(tcp_message)
-                logger.debug(f"发送TCP数据包到AGV {agv_id}:{port} (类型:{message_type:02X}): {len(tcp_message)}字节")
+                logger.debug("发送TCP数据包到AGV %s:%s (类型:%02X): %s字节", agv_id, port, message_type, len(tcp_message))
             else:
                 # 降级处理：直接发送JSON
                 data_with_type = {"message_type": message_type, "data": data}
-                json_data = json.dumps(data_with_type, ensure_ascii=False)
-                packet = json_data.encode('utf-8')
+                packet = _json_dumps_bytes(data_with_type)
                 sock.send(packet)
                 logger.warning(f"TCP模块不可用，直接发送JSON到AGV {agv_id}:{port}")
             
@@ -904,12 +999,26 @@ class TCPClientManager:
 class VDA5050Server:
     """VDA5050服务器 - 处理MQTT和TCP之间的消息转换"""
     
-    def __init__(self, mqtt_config: Dict[str, Any]):
+    __slots__ = ('mqtt_config', 'mqtt_options', 'mqtt_client', 'is_running', 'tcp_manager', 'display',
+                 '_stop_event', '_agv_identities', '_message_handlers')
+    
+    def __init__(self, mqtt_config: Dict[str, Any], mqtt_options: Optional[Dict[str, Any]] = None):
         self.mqtt_config = mqtt_config
+        self.mqtt_options = mqtt_options or {}
         self.mqtt_client = None
         self.is_running = False
         self.tcp_manager = None  # 添加TCP管理器引用
         self.display = DynamicTableDisplay()
+        self._stop_event = threading.Event()  # 停止信号，用于打断启动延迟的等待
+        
+        # AGV标识缓存：{agv_id: (manufacturer, serial_number, {消息类型: 主题})}
+        self._agv_identities = {}
+        
+        # 下行消息分发表：主题最后一级 -> 处理函数
+        self._message_handlers = {
+            "order": self._process_order_message,
+            "instantActions": self._process_instant_actions_message
+        }
         
         # 初始化MQTT客户端
         self._init_mqtt_client()
@@ -930,7 +1039,13 @@ class VDA5050Server:
             # 设置回调函数
             self.mqtt_client.on_connect = self._on_mqtt_connect
             self.mqtt_client.on_disconnect = self._on_mqtt_disconnect
-            self.mqtt_client.on_message = self._on_mqtt_message
+            self.mqtt_client.on_message = self._make_mqtt_message_callback()
+            
+            # 断线后由loop_start()的网络线程按指数退避自动重连，间隔取自mqtt_options配置
+            self.mqtt_client.reconnect_delay_set(
+                min_delay=self.mqtt_options.get('initial_reconnect_delay', 1),
+                max_delay=self.mqtt_options.get('max_reconnect_delay', 60)
+            )
             
             # 连接到MQTT代理
             self.mqtt_client.connect(
@@ -949,46 +1064,64 @@ class VDA5050Server:
         """MQTT连接回调"""
         if rc == 0:
             logger.info("MQTT连接成功")
+            # 回调运行在loop_start()创建的网络线程上，在此处绑定的是该线程自身
+            self._pin_network_thread()
             # 订阅VDA5050主题
             self._subscribe_vda5050_topics()
         else:
             logger.error(f"MQTT连接失败，错误代码: {rc}")
     
+    def _pin_network_thread(self):
+        """按MQTT_NET_CORES将当前线程（MQTT网络线程）绑定到指定CPU核心，减少与主线程的争用"""
+        if not MQTT_NET_CORES or not hasattr(os, 'sched_setaffinity'):
+            return
+        try:
+            # Linux上pid为0时只作用于调用线程
+            os.sched_setaffinity(0, MQTT_NET_CORES)
+            logger.info("MQTT网络线程 %s 已绑定CPU核心: %s", threading.get_native_id(), sorted(MQTT_NET_CORES))
+        except (OSError, ValueError) as e:
+            logger.warning("绑定MQTT网络线程CPU核心失败: %s", e)
+    
     def _on_mqtt_disconnect(self, client, userdata, flags, rc, properties=None):
         """MQTT断开连接回调"""
         logger.warning(f"MQTT连接断开，错误代码: {rc}")
     
-    def _on_mqtt_message(self, client, userdata, msg):
-        """MQTT消息接收回调"""
-        try:
-            topic = msg.topic
-            payload = msg.payload.decode('utf-8')
-            
-            logger.info(f"收到MQTT消息: {topic}")
-            
-            # 解析VDA5050消息并转换为TCP
-            self._process_vda5050_message(topic, payload)
+    def _make_mqtt_message_callback(self):
+        """生成MQTT消息接收回调
+        
+        处理方法和日志方法预先绑定为闭包变量，每条消息不再经过绑定方法和self属性查找
+        """
+        process = self._process_vda5050_message
+        log_info = logger.info
+        log_error = logger.error
+        
+        def on_mqtt_message(client, userdata, msg):
+            """MQTT消息接收回调"""
+            try:
+                topic = msg.topic
+                log_info("收到MQTT消息: %s", topic)
                 
-        except Exception as e:
-            logger.error(f"处理MQTT消息失败: {e}")
+                # 载荷保持为字节，由JSON解析器直接处理，无需先解码为字符串
+                # 解析VDA5050消息并转换为TCP
+                process(topic, msg.payload)
+                
+            except Exception as e:
+                log_error("处理MQTT消息失败: %s", e)
+        
+        return on_mqtt_message
     
     def _subscribe_vda5050_topics(self):
         """订阅VDA5050主题"""
         try:
             # 订阅所有AGV的order和instantActions主题
-            topics = [
-                "uagv/v2/+/+/order",
-                "uagv/v2/+/+/instantActions"
-            ]
-            
-            for topic in topics:
+            for topic in VDA5050_SUBSCRIBE_TOPICS:
                 self.mqtt_client.subscribe(topic)
                 logger.info(f"订阅MQTT主题: {topic}")
                     
         except Exception as e:
             logger.error(f"订阅MQTT主题失败: {e}")
     
-    def _process_vda5050_message(self, topic: str, payload: str):
+    def _process_vda5050_message(self, topic: str, payload: bytes):
         """处理VDA5050消息"""
         try:
             # 解析主题
@@ -1001,17 +1134,19 @@ class VDA5050Server:
             serial_number = topic_parts[3]
             message_type = topic_parts[4]
             
-            # 解析JSON数据
-            data = json.loads(payload)
+            # 根据消息类型查表分发，不支持的消息类型无需解析JSON
+            handler = self._message_handlers.get(message_type)
+            if handler is None:
+                return
             
-            # 根据消息类型处理
-            if message_type == "order":
-                self._process_order_message(manufacturer, serial_number, data)
-            elif message_type == "instantActions":
-                self._process_instant_actions_message(manufacturer, serial_number, data)
+            # 解析JSON数据
+            data = _json_loads(payload)
+            handler(manufacturer, serial_number, data)
                     
         except Exception as e:
             logger.error(f"处理VDA5050消息失败: {e}")
+            # 原始载荷只在出错时才截取输出
+            logger.debug("原始消息: %r", payload[:256])
     
     def _process_order_message(self, manufacturer: str, serial_number: str, data: Dict):
         """处理订单消息"""
@@ -1020,7 +1155,7 @@ class VDA5050Server:
             agv_id = serial_number
             if agv_id in self.tcp_manager.get_connected_agvs():
                 self.tcp_manager.send_to_agv(agv_id, 19206, data)
-                logger.info(f"发送订单到AGV {agv_id}")
+                logger.info("发送订单到AGV %s", agv_id)
             else:
                 logger.warning(f"AGV {agv_id} 未连接，无法发送订单")
                 
@@ -1036,7 +1171,7 @@ class VDA5050Server:
                 # 根据动作类型选择端口
                 port = 19206  # 默认端口
                 self.tcp_manager.send_to_agv(agv_id, port, data)
-                logger.info(f"发送即时动作到AGV {agv_id}")
+                logger.info("发送即时动作到AGV %s", agv_id)
             else:
                 logger.warning(f"AGV {agv_id} 未连接，无法发送即时动作")
                 
@@ -1046,13 +1181,16 @@ class VDA5050Server:
     def start(self):
         """启动服务器（优化版）"""
         self.is_running = True
+        self._stop_event.clear()
         
         # 启动TCP管理器
         self.tcp_manager.start()
         
         # 延迟启动动态显示，避免启动时阻塞
         def start_display_delayed():
-            time.sleep(2)  # 等待2秒让连接稳定
+            # 等待2秒让连接稳定，期间停止服务器则不再启动显示
+            if self._stop_event.wait(2):
+                return
             if self.is_running and self.display:
                 self.display.start_display(self.tcp_manager, self.mqtt_client)
         
@@ -1065,6 +1203,7 @@ class VDA5050Server:
     def stop(self):
         """停止服务器"""
         self.is_running = False
+        self._stop_event.set()
         
         # 停止动态显示
         self.display.stop_display()
@@ -1079,162 +1218,239 @@ class VDA5050Server:
         
         logger.info("VDA5050服务器已停止")
 
+    def _get_agv_identity(self, agv_id: str) -> Tuple[str, str, Dict[str, str]]:
+        """获取AGV的制造商、序列号及各上行消息主题
+        
+        AGV配置在启动时加载后不再变化，结果按agv_id缓存，发布消息时无需重复查找配置和拼接主题
+        """
+        identity = self._agv_identities.get(agv_id)
+        if identity is None:
+            agv_config = self.tcp_manager.all_agv_configs.get(agv_id) or _EMPTY_DICT
+            robot_info = agv_config.get('robot_info') or _EMPTY_DICT
+            manufacturer = robot_info.get('manufacturer', 'UNKNOWN')
+            serial_number = robot_info.get('serial_number', agv_id)
+            topic_prefix = f"uagv/v2/{manufacturer}/{serial_number}/"
+            topics = {topic_type: topic_prefix + topic_type for topic_type in VDA5050_PUBLISH_TOPIC_TYPES}
+            identity = (manufacturer, serial_number, topics)
+            self._agv_identities[agv_id] = identity
+        return identity
+    
+    def _build_state_message(self, agv_id: str, data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """构建VDA5050状态消息，返回(主题, 消息字典)"""
+        # 获取AGV标识信息
+        manufacturer, serial_number, topics = self._get_agv_identity(agv_id)
+        
+        # 构建VDA5050状态消息
+        state_message = {
+            "headerId": int(time.time()),
+            "timestamp": _message_timestamp(),
+            "version": VDA5050_VERSION,
+            "manufacturer": manufacturer,
+            "serialNumber": serial_number,
+            "orderId": data.get('orderId', ''),
+            "orderUpdateId": data.get('orderUpdateId', 0),
+            "zoneSetId": data.get('zoneSetId', ''),
+            "lastNodeId": data.get('lastNodeId', ''),
+            "lastNodeSequenceId": data.get('lastNodeSequenceId', 0),
+            "driving": data.get('driving', False),
+            "paused": data.get('paused', False),
+            "newBaseRequest": data.get('newBaseRequest', False),
+            "distanceSinceLastNode": data.get('distanceSinceLastNode', 0.0),
+            "operatingMode": data.get('operatingMode', 'AUTOMATIC'),
+            "nodeStates": data.get('nodeStates', _EMPTY_TUPLE),
+            "edgeStates": data.get('edgeStates', _EMPTY_TUPLE),
+            "agvPosition": data.get('agvPosition', _EMPTY_DICT),
+            "velocity": data.get('velocity', _EMPTY_DICT),
+            "loads": data.get('loads', _EMPTY_TUPLE),
+            "actionStates": data.get('actionStates', _EMPTY_TUPLE),
+            "batteryState": data.get('batteryState', _EMPTY_DICT),
+            "errors": data.get('errors', _EMPTY_TUPLE),
+            "information": data.get('information', _EMPTY_TUPLE),
+            "safetyState": data.get('safetyState', _EMPTY_DICT)
+        }
+        
+        return topics["state"], state_message
+    
     def publish_state_message(self, agv_id: str, data: Dict[str, Any]):
         """发布状态消息到MQTT"""
         try:
             if not self.mqtt_client:
                 return
             
-            # 获取AGV配置信息
-            agv_config = self.tcp_manager.all_agv_configs.get(agv_id, {})
-            robot_info = agv_config.get('robot_info', {})
-            manufacturer = robot_info.get('manufacturer', 'UNKNOWN')
-            serial_number = robot_info.get('serial_number', agv_id)
-            
-            # 构建VDA5050状态消息
-            state_message = {
-                "headerId": int(time.time()),
-                "timestamp": datetime.now().isoformat() + "Z",
-                "version": "2.0.0",
-                "manufacturer": manufacturer,
-                "serialNumber": serial_number,
-                "orderId": data.get('orderId', ''),
-                "orderUpdateId": data.get('orderUpdateId', 0),
-                "zoneSetId": data.get('zoneSetId', ''),
-                "lastNodeId": data.get('lastNodeId', ''),
-                "lastNodeSequenceId": data.get('lastNodeSequenceId', 0),
-                "driving": data.get('driving', False),
-                "paused": data.get('paused', False),
-                "newBaseRequest": data.get('newBaseRequest', False),
-                "distanceSinceLastNode": data.get('distanceSinceLastNode', 0.0),
-                "operatingMode": data.get('operatingMode', 'AUTOMATIC'),
-                "nodeStates": data.get('nodeStates', []),
-                "edgeStates": data.get('edgeStates', []),
-                "agvPosition": data.get('agvPosition', {}),
-                "velocity": data.get('velocity', {}),
-                "loads": data.get('loads', []),
-                "actionStates": data.get('actionStates', []),
-                "batteryState": data.get('batteryState', {}),
-                "errors": data.get('errors', []),
-                "information": data.get('information', []),
-                "safetyState": data.get('safetyState', {})
-            }
-            
-            # 发布状态消息
-            topic = f"uagv/v2/{manufacturer}/{serial_number}/state"
-            self.mqtt_client.publish(topic, json.dumps(state_message, ensure_ascii=False))
-            logger.debug(f"发布状态消息到MQTT: {topic}")
+            # 构建并发布状态消息
+            topic, state_message = self._build_state_message(agv_id, data)
+            self.mqtt_client.publish(topic, _json_dumps_bytes(state_message))
+            logger.debug("发布状态消息到MQTT: %s", topic)
             
         except Exception as e:
             logger.error(f"发布状态消息失败: {e}")
     
+    def _build_connection_message(self, agv_id: str, connection_state: str) -> Tuple[str, Dict[str, Any]]:
+        """构建VDA5050连接消息，返回(主题, 消息字典)"""
+        # 获取AGV标识信息
+        manufacturer, serial_number, topics = self._get_agv_identity(agv_id)
+        
+        # 构建VDA5050连接消息
+        connection_message = {
+            "headerId": int(time.time()),
+            "timestamp": _message_timestamp(),
+            "version": VDA5050_VERSION,
+            "manufacturer": manufacturer,
+            "serialNumber": serial_number,
+            "connectionState": connection_state
+        }
+        
+        return topics["connection"], connection_message
+    
     def publish_connection_message(self, agv_id: str, connection_state: str):
         """发布连接消息到MQTT"""
         try:
             if not self.mqtt_client:
                 return
             
-            # 获取AGV配置信息
-            agv_config = self.tcp_manager.all_agv_configs.get(agv_id, {})
-            robot_info = agv_config.get('robot_info', {})
-            manufacturer = robot_info.get('manufacturer', 'UNKNOWN')
-            serial_number = robot_info.get('serial_number', agv_id)
-            
-            # 构建VDA5050连接消息
-            connection_message = {
-                "headerId": int(time.time()),
-                "timestamp": datetime.now().isoformat() + "Z",
-                "version": "2.0.0",
-                "manufacturer": manufacturer,
-                "serialNumber": serial_number,
-                "connectionState": connection_state
-            }
-            
-            # 发布连接消息
-            topic = f"uagv/v2/{manufacturer}/{serial_number}/connection"
-            self.mqtt_client.publish(topic, json.dumps(connection_message, ensure_ascii=False))
-            logger.info(f"发布连接消息到MQTT: {topic} -> {connection_state}")
+            # 构建并发布连接消息
+            topic, connection_message = self._build_connection_message(agv_id, connection_state)
+            self.mqtt_client.publish(topic, _json_dumps_bytes(connection_message))
+            logger.info("发布连接消息到MQTT: %s -> %s", topic, connection_state)
             
         except Exception as e:
             logger.error(f"发布连接消息失败: {e}")
     
+    def _build_factsheet_message(self, agv_id: str) -> Tuple[str, Dict[str, Any]]:
+        """构建VDA5050产品说明书消息，返回(主题, 消息字典)"""
+        # 获取AGV标识信息和配置
+        manufacturer, serial_number, topics = self._get_agv_identity(agv_id)
+        agv_config = self.tcp_manager.all_agv_configs.get(agv_id) or _EMPTY_DICT
+        
+        # 构建VDA5050产品说明书消息
+        physical_parameters = agv_config.get('physical_parameters') or _EMPTY_DICT
+        vda5050_config = agv_config.get('vda5050') or _EMPTY_DICT
+        factsheet_message = {
+            "headerId": int(time.time()),
+            "timestamp": _message_timestamp(),
+            "version": VDA5050_VERSION,
+            "manufacturer": manufacturer,
+            "serialNumber": serial_number,
+            "typeSpecification": physical_parameters.get('type_specification', _EMPTY_DICT),
+            "physicalParameters": agv_config.get('physical_parameters', _EMPTY_DICT),
+            "protocolLimits": vda5050_config.get('protocol_limits', _EMPTY_DICT),
+            "protocolFeatures": vda5050_config.get('protocol_features', _EMPTY_DICT),
+            "agvGeometry": physical_parameters.get('agv_geometry', _EMPTY_DICT),
+            "loadSpecification": physical_parameters.get('load_specification', _EMPTY_DICT)
+        }
+        
+        return topics["factsheet"], factsheet_message
+    
     def publish_factsheet_message(self, agv_id: str):
         """发布产品说明书消息到MQTT"""
         try:
             if not self.mqtt_client:
                 return
             
-            # 获取AGV配置信息
-            agv_config = self.tcp_manager.all_agv_configs.get(agv_id, {})
-            robot_info = agv_config.get('robot_info', {})
-            manufacturer = robot_info.get('manufacturer', 'UNKNOWN')
-            serial_number = robot_info.get('serial_number', agv_id)
-            
-            # 构建VDA5050产品说明书消息
-            factsheet_message = {
-                "headerId": int(time.time()),
-                "timestamp": datetime.now().isoformat() + "Z",
-                "version": "2.0.0",
-                "manufacturer": manufacturer,
-                "serialNumber": serial_number,
-                "typeSpecification": agv_config.get('physical_parameters', {}).get('type_specification', {}),
-                "physicalParameters": agv_config.get('physical_parameters', {}),
-                "protocolLimits": agv_config.get('vda5050', {}).get('protocol_limits', {}),
-                "protocolFeatures": agv_config.get('vda5050', {}).get('protocol_features', {}),
-                "agvGeometry": agv_config.get('physical_parameters', {}).get('agv_geometry', {}),
-                "loadSpecification": agv_config.get('physical_parameters', {}).get('load_specification', {})
-            }
-            
-            # 发布产品说明书消息
-            topic = f"uagv/v2/{manufacturer}/{serial_number}/factsheet"
-            self.mqtt_client.publish(topic, json.dumps(factsheet_message, ensure_ascii=False))
-            logger.info(f"发布产品说明书消息到MQTT: {topic}")
+            # 构建并发布产品说明书消息
+            topic, factsheet_message = self._build_factsheet_message(agv_id)
+            self.mqtt_client.publish(topic, _json_dumps_bytes(factsheet_message))
+            logger.info("发布产品说明书消息到MQTT: %s", topic)
             
         except Exception as e:
             logger.error(f"发布产品说明书消息失败: {e}")
     
+    def _build_visualization_message(self, agv_id: str, data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """构建VDA5050可视化消息，返回(主题, 消息字典)"""
+        # 获取AGV标识信息
+        manufacturer, serial_number, topics = self._get_agv_identity(agv_id)
+        
+        # 构建VDA5050可视化消息
+        visualization_message = {
+            "headerId": int(time.time()),
+            "timestamp": _message_timestamp(),
+            "version": VDA5050_VERSION,
+            "manufacturer": manufacturer,
+            "serialNumber": serial_number,
+            "agvPosition": data.get('agvPosition', _EMPTY_DICT),
+            "velocity": data.get('velocity', _EMPTY_DICT),
+            "loads": data.get('loads', _EMPTY_TUPLE)
+        }
+        
+        return topics["visualization"], visualization_message
+    
     def publish_visualization_message(self, agv_id: str, data: Dict[str, Any]):
         """发布可视化消息到MQTT"""
         try:
             if not self.mqtt_client:
                 return
             
-            # 获取AGV配置信息
-            agv_config = self.tcp_manager.all_agv_configs.get(agv_id, {})
-            robot_info = agv_config.get('robot_info', {})
-            manufacturer = robot_info.get('manufacturer', 'UNKNOWN')
-            serial_number = robot_info.get('serial_number', agv_id)
-            
-            # 构建VDA5050可视化消息
-            visualization_message = {
-                "headerId": int(time.time()),
-                "timestamp": datetime.now().isoformat() + "Z",
-                "version": "2.0.0",
-                "manufacturer": manufacturer,
-                "serialNumber": serial_number,
-                "agvPosition": data.get('agvPosition', {}),
-                "velocity": data.get('velocity', {}),
-                "loads": data.get('loads', [])
-            }
-            
-            # 发布可视化消息
-            topic = f"uagv/v2/{manufacturer}/{serial_number}/visualization"
-            self.mqtt_client.publish(topic, json.dumps(visualization_message, ensure_ascii=False))
-            logger.debug(f"发布可视化消息到MQTT: {topic}")
+            # 构建并发布可视化消息
+            topic, visualization_message = self._build_visualization_message(agv_id, data)
+            self.mqtt_client.publish(topic, _json_dumps_bytes(visualization_message))
+            logger.debug("发布可视化消息到MQTT: %s", topic)
             
         except Exception as e:
             logger.error(f"发布可视化消息失败: {e}")
     
+    def publish_state_and_visualization_messages(self, agv_id: str, data: Dict[str, Any]):
+        """同一份状态数据同时发布状态消息和可视化消息
+        
+        两条消息分别构建，可视化消息构建失败时仍发布状态消息
+        """
+        if not self.mqtt_client:
+            return
+        
+        messages = []
+        try:
+            messages.append(self._build_state_message(agv_id, data))
+        except Exception as e:
+            logger.error(f"构建状态消息失败: {e}")
+        try:
+            messages.append(self._build_visualization_message(agv_id, data))
+        except Exception as e:
+            logger.error(f"构建可视化消息失败: {e}")
+        
+        try:
+            self.publish_messages(messages)
+        except Exception as e:
+            logger.error(f"发布状态和可视化消息失败: {e}")
+    
+    def publish_messages(self, messages: List[Tuple[str, Dict[str, Any]]], qos: int = 0) -> int:
+        """依次序列化并发布多条MQTT消息
+        
+        逐条调用publish，仅用于减少同一时刻产生多条消息时的重复代码
+        
+        Args:
+            messages: (主题, 消息字典)列表
+            qos: 发布使用的QoS等级
+            
+        Returns:
+            已提交发布的消息数量
+        """
+        if not self.mqtt_client or not messages:
+            return 0
+        
+        publish = self.mqtt_client.publish
+        for topic, message in messages:
+            publish(topic, _json_dumps_bytes(message), qos=qos)
+        
+        logger.debug("发布 %s 条消息到MQTT", len(messages))
+        return len(messages)
+    
     def _on_agv_connected(self, agv_id: str):
         """AGV连接成功时的回调"""
+        # 连接状态和产品说明书（只在连接时发布一次）同时产生，分别构建后一起发布，
+        # 产品说明书构建失败时仍发布ONLINE状态
+        messages = []
         try:
-            # 发布连接状态
-            self.publish_connection_message(agv_id, "ONLINE")
-            
-            # 发布产品说明书（只在连接时发布一次）
-            self.publish_factsheet_message(agv_id)
+            messages.append(self._build_connection_message(agv_id, "ONLINE"))
+        except Exception as e:
+            logger.error(f"构建连接消息失败: {e}")
+        try:
+            messages.append(self._build_factsheet_message(agv_id))
+        except Exception as e:
+            logger.error(f"构建产品说明书消息失败: {e}")
+        
+        try:
+            self.publish_messages(messages)
             
-            logger.info(f"AGV {agv_id} 已连接，发布连接和产品说明书消息")
+            logger.info("AGV %s 已连接，发布连接和产品说明书消息", agv_id)
             
         except Exception as e:
             logger.error(f"处理AGV连接事件失败: {e}")
@@ -1265,6 +1481,7 @@ def load_config() -> Optional[Dict[str, Any]]:
 
 def main():
     """主函数"""
+    _setup_logging()
     print("启动VDA5050 MQTT-TCP桥接服务器...")
     
     # 加载配置
@@ -1274,7 +1491,7 @@ def main():
         return
     
     # 创建VDA5050服务器
-    vda5050_server = VDA5050Server(config.get('mqtt_server', {}))
+    vda5050_server = VDA5050Server(config.get('mqtt_server', {}), config.get('mqtt_options', {}))
     
     # 创建TCP客户端管理器
     tcp_manager = TCPClientManager()
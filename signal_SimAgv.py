@@ -9,37 +9,108 @@
 
 import os
 import sys
+import atexit
+import heapq
+import itertools
 import json
 import yaml
 import socket
 import threading
 import time
 import logging
+import logging.handlers
+import queue
 import random
+import selectors
 import struct
-from datetime import datetime, timezone
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, List, Optional
 
-# 确保logs目录存在
-logs_dir = 'logs'
-if not os.path.exists(logs_dir):
-    os.makedirs(logs_dir)
+# JSON编解码（优先使用orjson，未安装时回退到标准库json）
+from tcp._json_backend import dumps_bytes as _json_dumps_bytes, loads as _json_loads
+# 当前UTC时间的ISO8601字符串（毫秒精度）
+from tcp._timestamp import utc_now_iso_millis as _utc_now_iso
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(logs_dir, 'virtual_agv.log'), encoding='utf-8'),
+logger = logging.getLogger(__name__)
+
+# 日志文件目录
+LOG_DIR = 'logs'
+
+
+def _setup_logging() -> logging.handlers.QueueListener:
+    """配置日志：调用方只把日志记录放入队列，文件和控制台输出由后台监听线程完成
+    
+    由main()调用，导入本模块时不创建日志文件也不启动线程
+    """
+    # 确保logs目录存在
+    os.makedirs(LOG_DIR, exist_ok=True)
+    
+    log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    output_handlers = [
+        logging.FileHandler(os.path.join(LOG_DIR, 'virtual_agv.log'), encoding='utf-8'),
         logging.StreamHandler(sys.stdout)
     ]
-)
-logger = logging.getLogger(__name__)
+    for handler in output_handlers:
+        handler.setFormatter(log_formatter)
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # 入队前只合并消息文本，时间、级别等格式由输出端处理器统一添加
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+    listener.start()
+    # 进程退出时停止监听线程，确保队列中剩余的日志全部写出
+    atexit.register(listener.stop)
+    
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+    return listener
+
+# TCP数据包格式：同步头(1B) + 版本(1B) + 序列号(2B) + 数据长度(4B) + 消息类型(2B) + 保留字段(6B) + 数据区
+PACKET_SYNC_HEADER = 0x5A        # 同步头
+PACKET_HEADER_SIZE = 16          # 包头长度
+MAX_PACKET_DATA_LENGTH = 100000  # 数据区最大长度
+RECV_BUFFER_SIZE = 65536         # 单次recv读取的最大字节数
+MAX_SEND_BACKLOG = 1048576       # 单个连接待发送数据上限，超出则判定客户端停滞并断开
+
+# 状态更新与状态上报周期（秒）
+STATE_UPDATE_INTERVAL = 1.0
+STATE_REPORT_INTERVAL = 1.0
+
+# 状态上报报文类型
+STATE_MESSAGE_TYPE = 9300
+
+# 包头结构：同步头、版本、序列号、数据长度、消息类型、保留字段
+PACKET_HEADER = struct.Struct('>BBHIH6s')
+PACKET_RESERVED = b'\x00' * 6
+
+# JSON数据的起始字符
+JSON_START_CHARS = ('{', '[')
+
+# 偏航角范围限制（弧度）
+YAW_LIMIT = 3.14159
+
+# 只读的空字典，用于替代.get(key, {})中每次新建的默认值
+_EMPTY_DICT: Dict[str, Any] = {}
+
+# 模拟的地图ID与定位置信度
+SIM_MAP_ID = "warehouse_map_001"
+SIM_CONFIDENCE = 0.95
+
+
+def _wrap_yaw(yaw: float) -> float:
+    """将偏航角限制在[-YAW_LIMIT, YAW_LIMIT]范围内，已在范围内时直接返回"""
+    if -YAW_LIMIT <= yaw <= YAW_LIMIT:
+        return yaw
+    return (yaw + YAW_LIMIT) % (2 * YAW_LIMIT) - YAW_LIMIT
 
 
 class VirtualAGVState:
     """虚拟AGV状态管理"""
     
+    __slots__ = ('config', 'robot_info', 'vehicle_id', 'manufacturer', 'serial_number',
+                 'position', 'velocity', 'battery_level', 'charging', 'errors',
+                 'current_order_id', 'last_node_id', 'driving', 'max_speed', 'max_acceleration',
+                 '_forward_speed', 'control_locked', 'control_owner', '_rng', '_state_template')
+    
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.robot_info = config.get('robot_info', {})
@@ -63,48 +134,47 @@ class VirtualAGVState:
         physical_params = self.robot_info.get('physical_parameters', {})
         self.max_speed = physical_params.get('speed_max', 2.0)
         self.max_acceleration = physical_params.get('acceleration_max', 1.0)
+        # 前进阶段的模拟速度只取决于配置，初始化时计算一次
+        self._forward_speed = min(0.5, self.max_speed * 0.3)
         
         # 控制权状态
         self.control_locked = False
         self.control_owner = ""
         
+        # 模拟噪声使用独立的随机数生成器
+        self._rng = random.Random()
+        
+        # 状态数据模板（静态字段只构建一次）
+        self._state_template = self._build_state_template()
+        
     def update_position(self):
         """更新位置信息（模拟运动）"""
         if self.driving:
             # 简单的运动模拟
             dt = 1.0  # 1秒更新间隔
             
-            # 模拟不同的运动模式
-            current_time = time.time()
-            
-            # 根据时间创建不同的运动模式
-            if int(current_time) % 30 < 10:  # 前进
-                self.velocity['vx'] = min(0.5, self.max_speed * 0.3)
-                self.velocity['vy'] = 0.0
-                self.velocity['omega'] = 0.0
-            elif int(current_time) % 30 < 15:  # 转弯
-                self.velocity['vx'] = 0.2
-                self.velocity['vy'] = 0.0
-                self.velocity['omega'] = 0.3
-            elif int(current_time) % 30 < 25:  # 侧移
-                self.velocity['vx'] = 0.0
-                self.velocity['vy'] = 0.3
-                self.velocity['omega'] = 0.0
+            # 根据时间创建不同的运动模式（30秒一个周期）
+            phase = int(time.time()) % 30
+            if phase < 10:  # 前进
+                vx, vy, omega = self._forward_speed, 0.0, 0.0
+            elif phase < 15:  # 转弯
+                vx, vy, omega = 0.2, 0.0, 0.3
+            elif phase < 25:  # 侧移
+                vx, vy, omega = 0.0, 0.3, 0.0
             else:  # 停止
-                self.velocity['vx'] = 0.0
-                self.velocity['vy'] = 0.0
-                self.velocity['omega'] = 0.0
-            
-            # 更新位置
-            self.position['x'] += self.velocity['vx'] * dt + random.uniform(-0.01, 0.01)
-            self.position['y'] += self.velocity['vy'] * dt + random.uniform(-0.01, 0.01)
-            self.position['yaw'] += self.velocity['omega'] * dt + random.uniform(-0.01, 0.01)
-            
-            # 限制角度范围
-            while self.position['yaw'] > 3.14159:
-                self.position['yaw'] -= 2 * 3.14159
-            while self.position['yaw'] < -3.14159:
-                self.position['yaw'] += 2 * 3.14159
+                vx, vy, omega = 0.0, 0.0, 0.0
+            
+            velocity = self.velocity
+            velocity['vx'] = vx
+            velocity['vy'] = vy
+            velocity['omega'] = omega
+            
+            # 更新位置（叠加随机噪声），并限制角度范围
+            position = self.position
+            uniform = self._rng.uniform
+            position['x'] += vx * dt + uniform(-0.01, 0.01)
+            position['y'] += vy * dt + uniform(-0.01, 0.01)
+            position['yaw'] = _wrap_yaw(position['yaw'] + omega * dt + uniform(-0.01, 0.01))
         else:
             # 停止时速度为0
             self.velocity = {'vx': 0.0, 'vy': 0.0, 'omega': 0.0}
@@ -121,45 +191,90 @@ class VirtualAGVState:
     
     def get_state_data(self) -> Dict[str, Any]:
         """获取当前状态数据"""
+        position = self.position
+        velocity = self.velocity
+        uniform = self._rng.uniform
+        x = round(position['x'], 4)
+        y = round(position['y'], 4)
+        yaw = round(position['yaw'], 4)
+        
+        # 基于模板浅拷贝，只填充动态字段（键顺序与模板一致）
+        state = self._state_template.copy()
+        state["header_id"] = int(time.time() * 1000) % 1000000
+        state["timestamp"] = _utc_now_iso()
+        
+        # 位置信息 - 增强的位置数据
+        state["x"] = x
+        state["y"] = y
+        state["yaw"] = yaw
+        
+        # 位置详细信息
+        state["position"] = {
+            "x": x,
+            "y": y,
+            "yaw": yaw,
+            "map_id": SIM_MAP_ID,
+            "confidence": SIM_CONFIDENCE,
+            "positioning_state": "LOCALIZED",
+            "deviation": {
+                "x": round(uniform(0.001, 0.01), 4),
+                "y": round(uniform(0.001, 0.01), 4),
+                "yaw": round(uniform(0.001, 0.01), 4)
+            }
+        }
+        
+        # 速度信息
+        state["vx"] = round(velocity['vx'], 3)
+        state["vy"] = round(velocity['vy'], 3)
+        state["omega"] = round(velocity['omega'], 3)
+        
+        # 状态信息
+        state["driving"] = self.driving
+        state["battery_level"] = round(self.battery_level, 3)
+        state["charging"] = self.charging
+        
+        # 订单信息
+        state["order_id"] = self.current_order_id
+        state["last_node_id"] = self.last_node_id
+        
+        # 控制权信息
+        state["current_lock"] = {
+            "locked": self.control_locked,
+            "nick_name": self.control_owner,
+            "ip": "192.168.9.105" if self.control_locked else ""
+        }
+        
+        # 错误信息
+        state["errors"] = self.errors
+        return state
+    
+    def _build_state_template(self) -> Dict[str, Any]:
+        """构建状态数据模板：静态字段直接给出取值，动态字段以None占位以固定键顺序"""
         return {
-            "header_id": int(time.time() * 1000) % 1000000,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "header_id": None,
+            "timestamp": None,
             "version": "2.0.0",
             "manufacturer": self.manufacturer,
             "serial_number": self.serial_number,
             "vehicle_id": self.vehicle_id,
             
-            # 位置信息 - 增强的位置数据
-            "x": round(self.position['x'], 4),
-            "y": round(self.position['y'], 4),
-            "yaw": round(self.position['yaw'], 4),
-            "map_id": "warehouse_map_001",
-            "confidence": 0.95,
-            
-            # 位置详细信息
-            "position": {
-                "x": round(self.position['x'], 4),
-                "y": round(self.position['y'], 4),
-                "yaw": round(self.position['yaw'], 4),
-                "map_id": "warehouse_map_001",
-                "confidence": 0.95,
-                "positioning_state": "LOCALIZED",
-                "deviation": {
-                    "x": round(random.uniform(0.001, 0.01), 4),
-                    "y": round(random.uniform(0.001, 0.01), 4),
-                    "yaw": round(random.uniform(0.001, 0.01), 4)
-                }
-            },
+            # 位置信息
+            "x": None,
+            "y": None,
+            "yaw": None,
+            "map_id": SIM_MAP_ID,
+            "confidence": SIM_CONFIDENCE,
+            "position": None,
             
             # 速度信息
-            "vx": round(self.velocity['vx'], 3),
-            "vy": round(self.velocity['vy'], 3),
-            "omega": round(self.velocity['omega'], 3),
+            "vx": None,
+            "vy": None,
+            "omega": None,
             
             # 状态信息
-            "driving": self.driving,
-            "battery_level": round(self.battery_level, 3),
-            "charging": self.charging,
+            "driving": None,
+            "battery_level": None,
+            "charging": None,
             "operating_mode": "AUTOMATIC",
             "node_states": [],
             "edge_states": [],
@@ -167,21 +282,17 @@ class VirtualAGVState:
             "action_states": [],
             
             # 订单信息
-            "order_id": self.current_order_id,
+            "order_id": None,
             "order_update_id": 0,
             "zone_set_id": "",
-            "last_node_id": self.last_node_id,
+            "last_node_id": None,
             "last_node_sequence_id": 0,
             
             # 控制权信息
-            "current_lock": {
-                "locked": self.control_locked,
-                "nick_name": self.control_owner,
-                "ip": "192.168.9.105" if self.control_locked else ""
-            },
+            "current_lock": None,
             
             # 错误信息
-            "errors": self.errors,
+            "errors": None,
             "fatals": [],
             "information": [],
             "warnings": []
@@ -195,22 +306,15 @@ class TCPBinaryProtocol:
     def create_binary_packet(message_type: int, data: Dict[str, Any]) -> bytes:
         """创建二进制TCP数据包"""
         try:
-            # 将数据转换为JSON字符串
-            json_data = json.dumps(data, ensure_ascii=False)
-            data_bytes = json_data.encode('utf-8')
+            # 将数据转换为UTF-8编码的JSON字节串
+            data_bytes = _json_dumps_bytes(data)
             
             # 构造数据包头
-            sync_header = 0x5A  # 同步头
-            version = 0x01      # 版本
             sequence = random.randint(1, 65535)  # 序列号
-            data_length = len(data_bytes)  # 数据长度
-            reserved = b'\x00' * 6  # 保留字段
             
             # 打包数据包头（16字节）
-            # 格式：同步头(1B) + 版本(1B) + 序列号(2B) + 数据长度(4B) + 消息类型(2B) + 保留字段(6B)
-            header = struct.pack('>BBHIHBBBBBB', 
-                               sync_header, version, sequence, data_length,
-                               message_type, 0, 0, 0, 0, 0, 0)
+            header = PACKET_HEADER.pack(PACKET_SYNC_HEADER, 0x01, sequence, len(data_bytes),
+                                        message_type, PACKET_RESERVED)
             
             # 组合完整数据包
             packet = header + data_bytes
@@ -226,17 +330,12 @@ class TCPBinaryProtocol:
     def parse_binary_packet(data: bytes) -> Optional[Dict[str, Any]]:
         """解析二进制TCP数据包"""
         try:
-            if len(data) < 16:
-                logger.warning(f"数据包太短，长度: {len(data)} < 16")
+            if len(data) < PACKET_HEADER_SIZE:
+                logger.warning(f"数据包太短，长度: {len(data)} < {PACKET_HEADER_SIZE}")
                 return None
             
             # 解析数据包头
-            header = struct.unpack('>BBHIHBBBBBB', data[:16])
-            sync_header = header[0]
-            version = header[1]
-            sequence = header[2]
-            data_length = header[3]
-            message_type = header[4]
+            sync_header, version, sequence, data_length, message_type, _ = PACKET_HEADER.unpack_from(data)
             
             logger.info(f"【数据包头解析】:")
             logger.info(f"  同步头: 0x{sync_header:02X} (期望: 0x5A)")
@@ -245,33 +344,39 @@ class TCPBinaryProtocol:
             logger.info(f"  数据长度: {data_length}")
             logger.info(f"  消息类型: 0x{message_type:04X} ({message_type})")
             
-            if sync_header != 0x5A:
+            if sync_header != PACKET_SYNC_HEADER:
                 logger.warning(f"无效的同步头: 0x{sync_header:02X}")
                 return None
             
             # 验证数据长度
-            if data_length < 0 or data_length > 100000:
+            if data_length > MAX_PACKET_DATA_LENGTH:
                 logger.warning(f"数据长度不合理: {data_length}")
                 return None
             
             # 检查是否有完整的数据包
-            if len(data) < 16 + data_length:
-                logger.warning(f"数据包不完整，期望长度: {16 + data_length}, 实际长度: {len(data)}")
+            packet_size = PACKET_HEADER_SIZE + data_length
+            if len(data) < packet_size:
+                logger.warning(f"数据包不完整，期望长度: {packet_size}, 实际长度: {len(data)}")
                 return None
             
-            # 提取数据部分
-            payload = data[16:16+data_length]
+            # 提取数据部分（内存视图切片，不复制数据区）
+            payload = memoryview(data)[PACKET_HEADER_SIZE:packet_size]
             logger.info(f"【数据区提取】:")
             logger.info(f"  数据区长度: {len(payload)} 字节")
-            logger.info(f"  数据区十六进制: {payload.hex().upper()}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("  数据区十六进制: %s", payload.hex().upper())
             
-            # 尝试解析JSON数据
+            # 仅当数据区以'{'或'['开头时才尝试解析JSON，避免对二进制/文本数据做注定失败的解析
             try:
-                payload_str = payload.decode('utf-8')
+                payload_str = str(payload, 'utf-8')
                 logger.info(f"  数据区文本: {payload_str}")
                 
-                payload_data = json.loads(payload_str)
-                logger.info("  JSON解析成功")
+                # 直接解析已解码的文本，数据区只解码这一次
+                if payload_str.lstrip()[:1] in JSON_START_CHARS:
+                    payload_data = _json_loads(payload_str)
+                    logger.info("  JSON解析成功")
+                else:
+                    payload_data = payload_str
                 
             except UnicodeDecodeError as e:
                 logger.warning(f"  UTF-8解码失败: {e}")
@@ -301,6 +406,11 @@ class TCPBinaryProtocol:
 class VirtualAGVTCPServer:
     """虚拟AGV TCP服务器"""
     
+    __slots__ = ('config', 'agv_state', 'protocol', 'servers', 'connections', 'is_running',
+                 'agv_ip', 'tcp_ports', 'state_port', '_command_handlers', '_selector',
+                 '_event_thread', '_wakeup_r', '_wakeup_w', '_client_addresses',
+                 '_state_sequence', '_timers', '_timer_seq')
+    
     def __init__(self, config_file: str = "robot_config/SIM_AGV.yaml"):
         self.config = self._load_config(config_file)
         self.agv_state = VirtualAGVState(self.config)
@@ -317,6 +427,21 @@ class VirtualAGVTCPServer:
         
         # 获取TCP端口配置
         self.tcp_ports = self._get_tcp_ports()
+        self.state_port = next(
+            (port for port, port_type in self.tcp_ports.items() if port_type == 'state_reporting'), None)
+        
+        # 指令分发表
+        self._command_handlers = self._build_command_handlers()
+        
+        # 事件循环（start时创建）
+        self._selector = None
+        self._event_thread = None
+        self._wakeup_r = None  # 停止时用于唤醒事件循环的套接字对
+        self._wakeup_w = None
+        self._client_addresses = {}  # {client_socket: client_address}
+        self._state_sequence = 0  # 状态上报数据包序列号
+        self._timers = []  # 定时任务小顶堆：(到期时间, 序号, 周期, 回调)
+        self._timer_seq = itertools.count()
         
         logger.info(f"虚拟AGV初始化完成 - 车辆ID: {self.agv_state.vehicle_id}")
         logger.info(f"监听地址: {self.agv_ip}")
@@ -373,16 +498,24 @@ class VirtualAGVTCPServer:
         logger.info("正在启动虚拟AGV服务器...")
         
         self.is_running = True
+        self._selector = selectors.DefaultSelector()
+        
+        # 唤醒套接字对：stop时写入一个字节，使阻塞中的select立即返回
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
         
         # 启动TCP服务器
         for port, port_type in self.tcp_ports.items():
             self._start_tcp_server(port, port_type)
         
-        # 启动状态更新线程
-        self._start_state_update_thread()
+        # 状态更新与状态上报（仅针对19301端口）作为周期任务在事件循环中执行
+        self.schedule(0.0, self._update_state, STATE_UPDATE_INTERVAL)
+        self.schedule(0.0, self._report_state, STATE_REPORT_INTERVAL)
         
-        # 启动状态上报线程（仅针对19301端口）
-        self._start_state_reporting_thread()
+        # 启动事件循环线程：统一处理连接、数据接收和定时任务
+        self._event_thread = threading.Thread(target=self._event_loop, daemon=True)
+        self._event_thread.start()
         
         logger.info("虚拟AGV服务器启动成功")
         logger.info("=" * 60)
@@ -399,6 +532,15 @@ class VirtualAGVTCPServer:
         
         self.is_running = False
         
+        # 唤醒事件循环并等待其退出
+        if self._wakeup_w:
+            try:
+                self._wakeup_w.send(b'x')
+            except OSError:
+                pass
+        if self._event_thread and self._event_thread.is_alive():
+            self._event_thread.join(timeout=STATE_UPDATE_INTERVAL * 2)
+        
         # 关闭所有连接
         for port, connections in self.connections.items():
             for conn in connections:
@@ -415,6 +557,15 @@ class VirtualAGVTCPServer:
             except:
                 pass
         
+        if self._selector:
+            self._selector.close()
+            self._selector = None
+        
+        for wakeup_socket in (self._wakeup_r, self._wakeup_w):
+            if wakeup_socket:
+                wakeup_socket.close()
+        self._wakeup_r = self._wakeup_w = None
+        
         logger.info("虚拟AGV服务器已停止")
     
     def _start_tcp_server(self, port: int, port_type: str):
@@ -424,182 +575,371 @@ class VirtualAGVTCPServer:
             server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             server_socket.bind((self.agv_ip, port))
             server_socket.listen(5)
+            server_socket.setblocking(False)
             
             self.servers[port] = server_socket
             self.connections[port] = []
             
-            # 启动接受连接的线程
-            accept_thread = threading.Thread(
-                target=self._accept_connections,
-                args=(server_socket, port, port_type),
-                daemon=True
-            )
-            accept_thread.start()
+            # 注册到选择器，由事件循环接受连接
+            self._selector.register(server_socket, selectors.EVENT_READ, (port, port_type, None, None))
             
             logger.info(f"TCP服务器启动 - 端口: {port}, 类型: {port_type}")
             
         except Exception as e:
             logger.error(f"启动TCP服务器失败 - 端口: {port}, 错误: {e}")
     
-    def _accept_connections(self, server_socket: socket.socket, port: int, port_type: str):
-        """接受TCP连接"""
+    def schedule(self, delay: float, callback: Callable[[], None], interval: Optional[float] = None):
+        """在事件循环中调度回调，用于替代在处理函数中sleep等待
+        
+        需在start之前或事件循环线程内（如指令处理函数中）调用
+        
+        Args:
+            delay: 距首次执行的延迟（秒）
+            callback: 回调函数，在事件循环线程中执行
+            interval: 重复执行的周期（秒），为None时只执行一次
+        """
+        heapq.heappush(self._timers, (time.monotonic() + delay, next(self._timer_seq), interval, callback))
+    
+    def _run_due_timers(self) -> Optional[float]:
+        """执行所有已到期的定时任务，返回距下一个定时任务的秒数（无任务时返回None）"""
+        timers = self._timers
+        now = time.monotonic()
+        while timers and timers[0][0] <= now:
+            deadline, seq, interval, callback = heapq.heappop(timers)
+            callback()
+            if interval is not None:
+                # 执行落后时不补发，从当前时间重新计时
+                heapq.heappush(timers, (max(deadline + interval, now), seq, interval, callback))
+        
+        if not timers:
+            return None
+        return max(0.0, timers[0][0] - time.monotonic())
+    
+    def _event_loop(self):
+        """事件循环：单线程处理所有端口的连接与数据，并执行定时任务"""
+        selector = self._selector
+        
         while self.is_running:
+            timeout = self._run_due_timers()
+            
             try:
-                client_socket, client_address = server_socket.accept()
-                logger.info(f"新连接建立 - 端口: {port}, 客户端: {client_address}")
-                
-                self.connections[port].append(client_socket)
-                
-                # 为每个连接启动处理线程
-                handle_thread = threading.Thread(
-                    target=self._handle_connection,
-                    args=(client_socket, port, port_type, client_address),
-                    daemon=True
-                )
-                handle_thread.start()
-                
+                events = selector.select(timeout)
             except Exception as e:
                 if self.is_running:
-                    logger.error(f"接受连接失败 - 端口: {port}, 错误: {e}")
+                    logger.error(f"事件循环异常: {e}")
                 break
-    
-    def _handle_connection(self, client_socket: socket.socket, port: int, 
-                          port_type: str, client_address):
-        """处理TCP连接"""
-        connection_id = f"{client_address[0]}:{client_address[1]}"
-        logger.info(f"开始处理连接 - 端口: {port}, 连接ID: {connection_id}")
-        
-        try:
-            while self.is_running:
-                # 接收数据
-                data = client_socket.recv(4096)
-                if not data:
-                    break
-                
-                # 完整打印接收到的TCP数据包
-                logger.info("=" * 80)
-                logger.info(f"【收到TCP数据包】- 端口: {port} ({port_type})")
-                logger.info(f"客户端地址: {client_address[0]}:{client_address[1]}")
-                logger.info(f"数据包长度: {len(data)} 字节")
-                logger.info(f"十六进制数据: {data.hex().upper()}")
-                
-                # 解析数据包
-                parsed_data = self.protocol.parse_binary_packet(data)
-                if parsed_data:
-                    logger.info("【数据包解析成功】")
-                    logger.info(f"消息类型: {parsed_data['message_type']}")
-                    logger.info(f"序列号: {parsed_data['sequence']}")
-                    logger.info(f"数据长度: {parsed_data['data_length']}")
-                    
-                    # 打印JSON格式的数据内容
-                    payload = parsed_data.get('payload', {})
-                    if payload:
-                        logger.info("【JSON数据内容】:")
-                        if isinstance(payload, dict):
-                            logger.info(json.dumps(payload, indent=2, ensure_ascii=False))
-                        else:
-                            logger.info(f"数据内容: {payload}")
-                    else:
-                        logger.info("【数据内容】: 空数据")
-                    
-                    # 处理特殊指令
-                    self._process_command(parsed_data, port, port_type)
-                    
-                    # 发送回复
-                    response = self._create_response(parsed_data, port, port_type)
-                    if response:
-                        client_socket.send(response)
-                        logger.info(f"【发送回复】- 长度: {len(response)}字节")
-                        logger.debug(f"回复数据: {response.hex().upper()}")
-                else:
-                    # 如果无法解析为二进制协议，尝试文本协议
+            
+            for key, mask in events:
+                if key.data is None:
+                    # 唤醒信号：清空后回到循环条件检查is_running
                     try:
-                        text_data = data.decode('utf-8')
-                        logger.info("【收到文本数据】:")
-                        logger.info(text_data)
-                        
-                        # 尝试解析为JSON
-                        try:
-                            json_data = json.loads(text_data)
-                            logger.info("【JSON格式数据】:")
-                            logger.info(json.dumps(json_data, indent=2, ensure_ascii=False))
-                        except json.JSONDecodeError:
-                            logger.info("【数据格式】: 普通文本")
-                        
-                        # 发送简单的JSON回复
-                        response = json.dumps({"OK": True, "status": "received"}).encode('utf-8')
-                        client_socket.send(response)
-                        logger.info(f"【发送文本回复】: {response.decode('utf-8')}")
-                    except Exception as e:
-                        logger.warning(f"【无法解析数据】: {e}")
-                        logger.warning("忽略此数据包")
+                        key.fileobj.recv(RECV_BUFFER_SIZE)
+                    except OSError:
+                        pass
+                    continue
                 
-                logger.info("=" * 80)
+                port, port_type, rx_buf, tx_buf = key.data
+                if rx_buf is None:
+                    self._accept_connection(key.fileobj, port, port_type)
+                    continue
                 
+                # 先发送积压数据，发送失败时连接已关闭，不再读取
+                if mask & selectors.EVENT_WRITE and not self._flush_connection(key, port, tx_buf):
+                    continue
+                if mask & selectors.EVENT_READ:
+                    self._read_connection(key.fileobj, port, port_type, rx_buf)
+    
+    def _accept_connection(self, server_socket: socket.socket, port: int, port_type: str):
+        """接受TCP连接并注册到选择器"""
+        try:
+            client_socket, client_address = server_socket.accept()
+        except BlockingIOError:
+            return
+        except Exception as e:
+            if self.is_running:
+                logger.error(f"接受连接失败 - 端口: {port}, 错误: {e}")
+            return
+        
+        logger.info(f"新连接建立 - 端口: {port}, 客户端: {client_address}")
+        
+        # 已连接套接字为非阻塞模式，发送不完的数据暂存到发送缓冲区，由事件循环在可写时继续发送
+        client_socket.setblocking(False)
+        # 回复和状态上报都是单个小数据包，关闭Nagle算法避免等待合并造成的延迟
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connections[port].append(client_socket)
+        
+        # 每个连接独立的接收缓冲区（处理TCP粘包和拆包）和发送缓冲区（暂存未发送完的数据）
+        self._selector.register(client_socket, selectors.EVENT_READ,
+                                (port, port_type, bytearray(), bytearray()))
+        self._client_addresses[client_socket] = client_address
+    
+    def _read_connection(self, client_socket: socket.socket, port: int, port_type: str,
+                         rx_buf: bytearray):
+        """读取一个已就绪连接的数据并处理其中的完整数据包"""
+        client_address = self._client_addresses.get(client_socket, ('unknown', 0))
+        try:
+            data = client_socket.recv(RECV_BUFFER_SIZE)
+            if data:
+                rx_buf += data
+                self._drain_frames(rx_buf, client_socket, port, port_type, client_address)
+                return
+        except BlockingIOError:
+            return
         except Exception as e:
             logger.error(f"处理连接异常 - 端口: {port}, 错误: {e}")
-        finally:
-            # 清理连接
+        
+        self._close_connection(client_socket, port)
+    
+    def _send_to_connection(self, client_socket: socket.socket, data, port: int) -> bool:
+        """非阻塞发送数据，未发送完的部分暂存到连接的发送缓冲区并监听可写事件
+        
+        Returns:
+            连接仍然有效时返回True；连接已断开或积压超限被关闭时返回False
+        """
+        try:
+            key = self._selector.get_key(client_socket)
+        except (AttributeError, KeyError, ValueError):
+            # 选择器已关闭或连接已注销
+            return False
+        
+        tx_buf = key.data[3]
+        if not tx_buf:
             try:
-                client_socket.close()
-                if port in self.connections and client_socket in self.connections[port]:
-                    self.connections[port].remove(client_socket)
-                    logger.info(f"连接已移除 - 端口: {port}, 连接ID: {connection_id}")
+                sent = client_socket.send(data)
+            except BlockingIOError:
+                sent = 0
             except Exception as e:
-                logger.error(f"清理连接失败: {e}")
-            logger.info(f"连接已关闭 - 端口: {port}, 连接ID: {connection_id}")
+                logger.warning(f"发送失败，移除连接 - 端口: {port}, 错误: {e}")
+                self._close_connection(client_socket, port)
+                return False
+            if sent == len(data):
+                return True
+            data = memoryview(data)[sent:]
+        
+        # 客户端长时间不读取导致积压超限时断开，避免占用内存
+        if len(tx_buf) + len(data) > MAX_SEND_BACKLOG:
+            logger.warning(f"发送积压超过 {MAX_SEND_BACKLOG} 字节，断开停滞的客户端 - 端口: {port}")
+            self._close_connection(client_socket, port)
+            return False
+        
+        if not tx_buf:
+            self._selector.modify(client_socket, selectors.EVENT_READ | selectors.EVENT_WRITE, key.data)
+        tx_buf += data
+        return True
     
-    def _process_command(self, parsed_data: Dict[str, Any], port: int, port_type: str):
-        """处理特殊指令"""
-        message_type = parsed_data.get('message_type')
-        payload = parsed_data.get('payload', {})
+    def _flush_connection(self, key: selectors.SelectorKey, port: int, tx_buf: bytearray) -> bool:
+        """连接可写时继续发送缓冲区中的积压数据，发送完毕后取消可写监听
+        
+        Returns:
+            连接仍然有效时返回True，发送失败关闭连接时返回False
+        """
+        client_socket = key.fileobj
+        try:
+            sent = client_socket.send(tx_buf)
+        except BlockingIOError:
+            return True
+        except Exception as e:
+            logger.warning(f"发送失败，移除连接 - 端口: {port}, 错误: {e}")
+            self._close_connection(client_socket, port)
+            return False
+        
+        del tx_buf[:sent]
+        if not tx_buf:
+            self._selector.modify(client_socket, selectors.EVENT_READ, key.data)
+        return True
+    
+    def _close_connection(self, client_socket: socket.socket, port: int):
+        """注销并关闭连接"""
+        client_address = self._client_addresses.pop(client_socket, ('unknown', 0))
+        connection_id = f"{client_address[0]}:{client_address[1]}"
+        try:
+            if self._selector:
+                self._selector.unregister(client_socket)
+        except (KeyError, ValueError):
+            pass
+        try:
+            client_socket.close()
+            if port in self.connections and client_socket in self.connections[port]:
+                self.connections[port].remove(client_socket)
+                logger.info(f"连接已移除 - 端口: {port}, 连接ID: {connection_id}")
+        except Exception as e:
+            logger.error(f"清理连接失败: {e}")
+        logger.info(f"连接已关闭 - 端口: {port}, 连接ID: {connection_id}")
+    
+    def _drain_frames(self, rx_buf: bytearray, client_socket: socket.socket, port: int,
+                      port_type: str, client_address):
+        """从接收缓冲区中取出所有完整的数据包并逐个处理，不完整的数据留待下次接收"""
+        while rx_buf:
+            # 不以同步头开头的数据按文本协议处理
+            if rx_buf[0] != PACKET_SYNC_HEADER:
+                text_data = bytes(rx_buf)
+                rx_buf.clear()
+                self._handle_text_data(text_data, client_socket, port, port_type, client_address)
+                return
+            
+            # 包头尚未接收完整
+            if len(rx_buf) < PACKET_HEADER_SIZE:
+                return
+            
+            data_length = PACKET_HEADER.unpack_from(rx_buf)[3]
+            if data_length > MAX_PACKET_DATA_LENGTH:
+                logger.warning(f"数据长度不合理: {data_length}，丢弃缓冲区数据 {len(rx_buf)} 字节")
+                rx_buf.clear()
+                return
+            
+            # 数据区尚未接收完整
+            packet_size = PACKET_HEADER_SIZE + data_length
+            if len(rx_buf) < packet_size:
+                return
+            
+            packet = bytes(rx_buf[:packet_size])
+            del rx_buf[:packet_size]
+            self._handle_packet(packet, client_socket, port, port_type, client_address)
+    
+    def _handle_packet(self, data: bytes, client_socket: socket.socket, port: int,
+                       port_type: str, client_address):
+        """处理一个完整的二进制数据包"""
+        # 完整打印接收到的TCP数据包
+        logger.info("=" * 80)
+        logger.info(f"【收到TCP数据包】- 端口: {port} ({port_type})")
+        logger.info(f"客户端地址: {client_address[0]}:{client_address[1]}")
+        logger.info(f"数据包长度: {len(data)} 字节")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("十六进制数据: %s", data.hex().upper())
+        
+        # 解析数据包
+        parsed_data = self.protocol.parse_binary_packet(data)
+        if parsed_data:
+            logger.info("【数据包解析成功】")
+            logger.info(f"消息类型: {parsed_data['message_type']}")
+            logger.info(f"序列号: {parsed_data['sequence']}")
+            logger.info(f"数据长度: {parsed_data['data_length']}")
+            
+            # 打印JSON格式的数据内容
+            payload = parsed_data.get('payload') or _EMPTY_DICT
+            if payload:
+                if isinstance(payload, dict):
+                    # 完整JSON内容仅在DEBUG级别输出，避免每个数据包都序列化一次
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("【JSON数据内容】: %s", json.dumps(payload, ensure_ascii=False))
+                else:
+                    logger.info(f"【数据内容】: {payload}")
+            else:
+                logger.info("【数据内容】: 空数据")
+            
+            # 处理特殊指令
+            self._process_command(parsed_data, port, port_type)
+            
+            # 发送回复
+            response = self._create_response(parsed_data, port, port_type)
+            if response and self._send_to_connection(client_socket, response, port):
+                logger.info(f"【发送回复】- 长度: {len(response)}字节")
+                logger.debug(f"回复数据: {response.hex().upper()}")
+        else:
+            logger.warning("【无法解析数据包】，忽略此数据包")
+        
+        logger.info("=" * 80)
+    
+    def _handle_text_data(self, data: bytes, client_socket: socket.socket, port: int,
+                          port_type: str, client_address):
+        """处理非二进制协议的文本数据"""
+        logger.info("=" * 80)
+        logger.info(f"【收到TCP数据】- 端口: {port} ({port_type})")
+        logger.info(f"客户端地址: {client_address[0]}:{client_address[1]}")
+        logger.info(f"数据长度: {len(data)} 字节")
         
         try:
-            # 控制权抢夺指令
-            if message_type == 4005 and port_type == 'authority':
-                nick_name = payload.get('nick_name', 'unknown') if isinstance(payload, dict) else 'unknown'
-                self.agv_state.control_locked = True
-                self.agv_state.control_owner = nick_name
-                logger.info(f"控制权已被抢夺 - 所有者: {nick_name}")
-            
-            # 控制权释放指令
-            elif message_type == 4006 and port_type == 'authority':
-                self.agv_state.control_locked = False
-                self.agv_state.control_owner = ""
-                logger.info("控制权已释放")
-            
-            # 运动控制指令
-            elif message_type in [3001, 3002, 3066] and port_type == 'movement':
-                if message_type == 3001:  # 恢复运动
-                    self.agv_state.driving = True
-                    logger.info("开始运动")
-                elif message_type == 3002:  # 暂停运动
-                    self.agv_state.driving = False
-                    logger.info("暂停运动")
-                elif message_type == 3066:  # 任务列表
-                    if isinstance(payload, dict) and 'move_task_list' in payload:
-                        tasks = payload['move_task_list']
-                        logger.info(f"收到移动任务列表: {len(tasks)}个任务")
-                        self.agv_state.driving = True
-            
-            # 重定位指令
-            elif message_type == 2002 and port_type == 'relocation':
-                logger.info("收到重定位指令")
-            
-            # 清除错误指令
-            elif message_type == 4009 and port_type == 'authority':
-                self.agv_state.errors.clear()
-                logger.info("错误已清除")
-            
-            # 安全停止指令
-            elif message_type == 6004 and port_type == 'safety':
-                self.agv_state.driving = False
-                self.agv_state.velocity = {'vx': 0.0, 'vy': 0.0, 'omega': 0.0}
-                logger.info("安全停止")
+            text_data = data.decode('utf-8')
+            logger.info("【收到文本数据】:")
+            logger.info(text_data)
+            
+            # 尝试解析为JSON
+            try:
+                json_data = _json_loads(data)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("【JSON格式数据】: %s", json.dumps(json_data, ensure_ascii=False))
+            except json.JSONDecodeError:
+                logger.info("【数据格式】: 普通文本")
             
+            # 发送简单的JSON回复
+            response = _json_dumps_bytes({"OK": True, "status": "received"})
+            if self._send_to_connection(client_socket, response, port):
+                logger.info(f"【发送文本回复】: {response.decode('utf-8')}")
+        except Exception as e:
+            logger.warning(f"【无法解析数据】: {e}")
+            logger.warning("忽略此数据包")
+        
+        logger.info("=" * 80)
+    
+    def _process_command(self, parsed_data: Dict[str, Any], port: int, port_type: str):
+        """处理特殊指令（按端口类型和报文类型查表分发）"""
+        handler = self._command_handlers.get((port_type, parsed_data.get('message_type')))
+        if handler is None:
+            return
+        
+        try:
+            handler(parsed_data.get('payload') or _EMPTY_DICT)
         except Exception as e:
             logger.error(f"处理指令失败: {e}")
     
+    def _build_command_handlers(self) -> Dict[tuple, Callable[[Any], None]]:
+        """构建(端口类型, 报文类型) -> 指令处理函数的分发表"""
+        return {
+            ('authority', 4005): self._handle_grab_control,      # 控制权抢夺
+            ('authority', 4006): self._handle_release_control,   # 控制权释放
+            ('authority', 4009): self._handle_clear_errors,      # 清除错误
+            ('movement', 3001): self._handle_resume,             # 恢复运动
+            ('movement', 3002): self._handle_pause,              # 暂停运动
+            ('movement', 3066): self._handle_move_task_list,     # 任务列表
+            ('relocation', 2002): self._handle_relocation,       # 重定位
+            ('safety', 6004): self._handle_safety_stop,          # 安全停止
+        }
+    
+    def _handle_grab_control(self, payload: Any):
+        """控制权抢夺指令"""
+        nick_name = payload.get('nick_name', 'unknown') if isinstance(payload, dict) else 'unknown'
+        self.agv_state.control_locked = True
+        self.agv_state.control_owner = nick_name
+        logger.info(f"控制权已被抢夺 - 所有者: {nick_name}")
+    
+    def _handle_release_control(self, payload: Any):
+        """控制权释放指令"""
+        self.agv_state.control_locked = False
+        self.agv_state.control_owner = ""
+        logger.info("控制权已释放")
+    
+    def _handle_clear_errors(self, payload: Any):
+        """清除错误指令"""
+        self.agv_state.errors.clear()
+        logger.info("错误已清除")
+    
+    def _handle_resume(self, payload: Any):
+        """恢复运动指令"""
+        self.agv_state.driving = True
+        logger.info("开始运动")
+    
+    def _handle_pause(self, payload: Any):
+        """暂停运动指令"""
+        self.agv_state.driving = False
+        logger.info("暂停运动")
+    
+    def _handle_move_task_list(self, payload: Any):
+        """任务列表指令"""
+        if isinstance(payload, dict) and 'move_task_list' in payload:
+            tasks = payload['move_task_list']
+            logger.info(f"收到移动任务列表: {len(tasks)}个任务")
+            self.agv_state.driving = True
+    
+    def _handle_relocation(self, payload: Any):
+        """重定位指令"""
+        logger.info("收到重定位指令")
+    
+    def _handle_safety_stop(self, payload: Any):
+        """安全停止指令"""
+        self.agv_state.driving = False
+        self.agv_state.velocity = {'vx': 0.0, 'vy': 0.0, 'omega': 0.0}
+        logger.info("安全停止")
+    
     def _create_response(self, parsed_data: Dict[str, Any], port: int, port_type: str) -> bytes:
         """创建回复消息"""
         try:
@@ -614,7 +954,7 @@ class VirtualAGVTCPServer:
                 "OK": True,
                 "status": "received",
                 "message_type": message_type,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": _utc_now_iso(),
                 "vehicle_id": self.agv_state.vehicle_id
             }
             
@@ -638,78 +978,55 @@ class VirtualAGVTCPServer:
             except:
                 return b'{"OK": true}'
     
-    def _start_state_update_thread(self):
-        """启动状态更新线程"""
-        def state_update_loop():
-            while self.is_running:
-                try:
-                    # 更新AGV状态
-                    self.agv_state.update_position()
-                    self.agv_state.update_battery()
-                    
-                    # 模拟一些随机事件
-                    if random.random() < 0.001:  # 0.1%概率
-                        self.agv_state.charging = not self.agv_state.charging
-                        status = "开始充电" if self.agv_state.charging else "停止充电"
-                        logger.info(f"状态变化: {status}")
-                    
-                    time.sleep(1.0)  # 1秒更新一次
-                    
-                except Exception as e:
-                    logger.error(f"状态更新异常: {e}")
-                    time.sleep(1.0)
-        
-        update_thread = threading.Thread(target=state_update_loop, daemon=True)
-        update_thread.start()
-        logger.info("状态更新线程已启动")
-    
-    def _start_state_reporting_thread(self):
-        """启动状态上报线程（仅针对19301端口）"""
-        def state_reporting_loop():
-            while self.is_running:
-                try:
-                    # 检查19301端口是否有连接
-                    state_port = None
-                    for port, port_type in self.tcp_ports.items():
-                        if port_type == 'state_reporting':
-                            state_port = port
-                            break
+    def _update_state(self):
+        """更新AGV状态（由事件循环每秒调用一次）"""
+        try:
+            # 更新AGV状态
+            self.agv_state.update_position()
+            self.agv_state.update_battery()
+            
+            # 模拟一些随机事件
+            if random.random() < 0.001:  # 0.1%概率
+                self.agv_state.charging = not self.agv_state.charging
+                status = "开始充电" if self.agv_state.charging else "停止充电"
+                logger.info(f"状态变化: {status}")
+                
+        except Exception as e:
+            logger.error(f"状态更新异常: {e}")
+    
+    def _report_state(self):
+        """向19301端口的所有连接上报状态（由事件循环每秒调用一次）"""
+        try:
+            state_port = self.state_port
+            if state_port and state_port in self.connections:
+                connections = self.connections[state_port]
+                if connections:
+                    # 获取当前状态数据
+                    state_data = self.agv_state.get_state_data()
                     
-                    if state_port and state_port in self.connections:
-                        connections = self.connections[state_port]
-                        if connections:
-                            # 获取当前状态数据
-                            state_data = self.agv_state.get_state_data()
-                            
-                            # 创建状态上报数据包
-                            packet = self.protocol.create_binary_packet(9300, state_data)
-                            
-                            # 发送给所有连接的客户端
-                            for conn in connections[:]:  # 使用切片避免迭代时修改
-                                try:
-                                    conn.send(packet)
-                                    logger.info(f"状态上报成功 - 端口: {state_port}, 连接数: {len(connections)}")
-                                except Exception as e:
-                                    # 连接已断开，移除
-                                    logger.warning(f"状态上报失败，移除连接: {e}")
-                                    try:
-                                        connections.remove(conn)
-                                        conn.close()
-                                    except:
-                                        pass
-                        else:
-                            logger.debug(f"状态上报端口 {state_port} 暂无连接")
+                    # 创建状态上报数据包，所有连接共用同一个数据包
+                    packet = self._build_state_packet(state_data)
                     
-                    # 每秒上报一次
-                    time.sleep(1.0)
+                    # 发送给所有连接的客户端
+                    for conn in connections[:]:  # 使用切片避免迭代时修改
+                        # 非阻塞发送，失败或积压超限的连接在内部被移除
+                        if self._send_to_connection(conn, packet, state_port):
+                            logger.info(f"状态上报成功 - 端口: {state_port}, 连接数: {len(connections)}")
+                else:
+                    logger.debug(f"状态上报端口 {state_port} 暂无连接")
                     
-                except Exception as e:
-                    logger.error(f"状态上报异常: {e}")
-                    time.sleep(1.0)
+        except Exception as e:
+            logger.error(f"状态上报异常: {e}")
+    
+    def _build_state_packet(self, state_data: Dict[str, Any]) -> bytes:
+        """将状态数据打包为状态上报数据包（不可变字节串，可安全暂存到各连接的发送缓冲区）"""
+        payload = _json_dumps_bytes(state_data)
         
-        reporting_thread = threading.Thread(target=state_reporting_loop, daemon=True)
-        reporting_thread.start()
-        logger.info("状态上报线程已启动")
+        # 序列号按16位循环递增
+        sequence = (self._state_sequence + 1) & 0xFFFF
+        self._state_sequence = sequence
+        return PACKET_HEADER.pack(PACKET_SYNC_HEADER, 0x01, sequence, len(payload),
+                                  STATE_MESSAGE_TYPE, PACKET_RESERVED) + payload
     
     def print_status(self):
         """打印当前状态"""
@@ -758,6 +1075,7 @@ def main():
                        help='状态打印间隔（秒）')
     
     args = parser.parse_args()
+    _setup_logging()
     
     try:
         # 创建虚拟AGV
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON编解码后端
+优先使用高性能的orjson，未安装时回退到标准库json，两种实现的输出格式保持一致
+"""
+
+import json
+from typing import Any
+
+# 可选的高性能JSON库，未安装时回退到标准库json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+__all__ = [
+    "ORJSON_AVAILABLE",
+    "dumps_bytes",
+    "dumps_pretty",
+    "loads"
+]
+
+
+if ORJSON_AVAILABLE:
+    dumps_bytes = orjson.dumps
+    loads = orjson.loads
+
+    def dumps_pretty(data: Any) -> str:
+        """序列化为带2空格缩进的JSON字符串"""
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8')
+else:
+    def dumps_bytes(data: Any) -> bytes:
+        """序列化为紧凑的UTF-8编码JSON字节串（与orjson输出格式一致）"""
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def dumps_pretty(data: Any) -> str:
+        """序列化为带2空格缩进的JSON字符串"""
+        return json.dumps(data, indent=2, ensure_ascii=False)
+
+    loads = json.loads
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ISO8601时间戳生成
+直接由time.time_ns()格式化，省去datetime对象的构造与时区换算；
+秒级前缀每秒只格式化一次，同一秒内只拼接小数部分
+"""
+
+import time
+
+__all__ = [
+    "utc_now_iso",
+    "utc_now_iso_millis",
+    "utc_now_iso_seconds",
+    "local_now_iso_z"
+]
+
+# 秒级前缀缓存：(epoch秒, 秒级前缀)
+# 每次整体替换为新元组，读取方一次取出两个值，多线程下读到的秒数与前缀始终匹配
+_utc_prefix_cache = (-1, "")
+_local_prefix_cache = (-1, "")
+
+
+def _utc_prefix(seconds: int) -> str:
+    """返回epoch秒对应的UTC秒级前缀，如2024-01-15T10:30:00"""
+    global _utc_prefix_cache
+    cached_seconds, prefix = _utc_prefix_cache
+    if cached_seconds != seconds:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))
+        _utc_prefix_cache = (seconds, prefix)
+    return prefix
+
+
+def _local_prefix(seconds: int) -> str:
+    """返回epoch秒对应的本地时间秒级前缀"""
+    global _local_prefix_cache
+    cached_seconds, prefix = _local_prefix_cache
+    if cached_seconds != seconds:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(seconds))
+        _local_prefix_cache = (seconds, prefix)
+    return prefix
+
+
+def utc_now_iso() -> str:
+    """返回当前UTC时间的ISO8601字符串（微秒精度）
+
+    与datetime.now(timezone.utc).isoformat()格式一致
+    """
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    micros = nanos // 1000
+    if micros:
+        return f"{_utc_prefix(seconds)}.{micros:06d}+00:00"
+    # isoformat在微秒为0时省略小数部分
+    return f"{_utc_prefix(seconds)}+00:00"
+
+
+def utc_now_iso_millis() -> str:
+    """返回当前UTC时间的ISO8601字符串（毫秒精度），如2024-01-15T10:30:00.123+00:00"""
+    seconds, millis = divmod(time.time_ns() // 1_000_000, 1000)
+    return f"{_utc_prefix(seconds)}.{millis:03d}+00:00"
+
+
+def utc_now_iso_seconds() -> str:
+    """返回当前UTC时间的ISO8601字符串（秒精度），如2024-01-15T10:30:00+00:00"""
+    return f"{_utc_prefix(time.time_ns() // 1_000_000_000)}+00:00"
+
+
+def local_now_iso_z() -> str:
+    """返回当前本地时间的ISO8601字符串（微秒精度，带'Z'后缀）
+
+    与datetime.now().isoformat() + "Z"格式一致
+    """
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    micros = nanos // 1000
+    if micros:
+        return f"{_local_prefix(seconds)}.{micros:06d}Z"
+    return f"{_local_prefix(seconds)}Z"
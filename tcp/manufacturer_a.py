@@ -118,7 +118,7 @@ class ManufacturerATCPProtocol:
             
             # 移除JSON中的空格以减少数据包大小
             json_str = json.dumps(tcp_message, ensure_ascii=False, separators=(',', ':'))
-            logger.debug(f"[JSON] 创建TCP JSON消息 - 类型: {message_type}, 长度: {len(json_str)}")
+            logger.debug("[JSON] 创建TCP JSON消息 - 类型: %s, 长度: %s", message_type, len(json_str))
             return json_str
             
         except Exception as e:
@@ -140,7 +140,7 @@ class ManufacturerATCPProtocol:
             json_str = self.create_tcp_message_json(message_type, data)
             message_bytes = json_str.encode('utf-8')
             
-            logger.debug(f"[INFO] 创建TCP字节消息 - 类型: {message_type}, 字节数: {len(message_bytes)}")
+            logger.debug("[INFO] 创建TCP字节消息 - 类型: %s, 字节数: %s", message_type, len(message_bytes))
             return message_bytes
             
         except Exception as e:
@@ -167,7 +167,7 @@ class ManufacturerATCPProtocol:
                 # 空数据区，数据长度为0
                 data_bytes = b''
                 data_length = 0
-                logger.info(f"[INFO] 构建空数据区TCP包 - 类型: {message_type}")
+                logger.info("[INFO] 构建空数据区TCP包 - 类型: %s", message_type)
             else:
                 # 将数据转换为JSON字符串，移除不必要的空格
                 data_json = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
@@ -189,8 +189,10 @@ class ManufacturerATCPProtocol:
             # 添加数据内容
             packet.extend(data_bytes)
             
-            logger.info(f"[INFO] 构建二进制TCP包 - 类型: {message_type}, 序列: {sequence}, 数据长度: {data_length}")
-            logger.debug(f"   十六进制数据: {packet.hex().upper()}")
+            logger.info("[INFO] 构建二进制TCP包 - 类型: %s, 序列: %s, 数据长度: %s", message_type, sequence, data_length)
+            # 整包十六进制转储仅在DEBUG级别生成，避免每个发送的数据包都额外编码一遍
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("   十六进制数据: %s", packet.hex().upper())
             
             return bytes(packet)
             
@@ -245,9 +247,10 @@ class ManufacturerATCPProtocol:
             # 添加数据内容
             packet.extend(data_bytes)
             
-            logger.info(f"[INFO] 构建十六进制二进制TCP包 - 类型: {message_type}, 序列: {sequence}, 数据长度: {data_length}")
-            logger.debug(f"   原始十六进制数据: {clean_hex_data}")
-            logger.debug(f"   完整数据包: {packet.hex().upper()}")
+            logger.info("[INFO] 构建十六进制二进制TCP包 - 类型: %s, 序列: %s, 数据长度: %s", message_type, sequence, data_length)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("   原始十六进制数据: %s", clean_hex_data)
+                logger.debug("   完整数据包: %s", packet.hex().upper())
             
             return bytes(packet)
             
@@ -270,10 +273,9 @@ class ManufacturerATCPProtocol:
                 logger.warning(f"[WARNING] 数据包太短，长度: {len(data)}")
                 return None
             
-            # 尝试直接解析JSON格式
+            # 尝试直接解析JSON格式（json.loads可直接接受UTF-8字节，无需先解码）
             try:
-                json_str = data.decode('utf-8')
-                parsed_data = json.loads(json_str)
+                parsed_data = json.loads(data)
                 
                 result = {
                     'format': 'json',
@@ -283,7 +285,7 @@ class ManufacturerATCPProtocol:
                     'raw_json': parsed_data
                 }
                 
-                logger.debug(f"[JSON] 解析JSON格式TCP包 - 类型: {result['message_type']}")
+                logger.debug("[JSON] 解析JSON格式TCP包 - 类型: %s", result['message_type'])
                 return result
                 
             except (UnicodeDecodeError, json.JSONDecodeError):
@@ -342,7 +344,7 @@ class ManufacturerATCPProtocol:
                 'raw_payload': payload_data.hex() if payload_data else None
             }
             
-            logger.debug(f"[BINARY] 解析二进制TCP包 - 类型: {message_type}, 序列: {sequence}")
+            logger.debug("[BINARY] 解析二进制TCP包 - 类型: %s, 序列: %s", message_type, sequence)
             return result
             
         except Exception as e:
@@ -20,6 +20,7 @@ class TCPBinaryParser:
     SYNC_HEADER = 0x5A  # 同步头：0x5A
     DEFAULT_VERSION = 0x01
     RESERVED_BYTES = b'\x00\x00\x00\x00\x00\x00'
+    JSON_START_BYTES = (b'{', b'[')  # JSON数据的起始字节
     
     def __init__(self):
         self.sequence_counter = 0
@@ -108,16 +109,17 @@ class TCPBinaryParser:
         根据消息类型进行不同的解析
         """
         try:
-            # 首先尝试作为JSON解析
-            try:
-                json_str = payload.decode('utf-8')
-                return {
-                    'type': 'json',
-                    'data': json.loads(json_str),
-                    'raw_text': json_str
-                }
-            except (UnicodeDecodeError, json.JSONDecodeError):
-                pass
+            # 以'{'或'['开头时才尝试作为JSON解析，二进制数据无需经过解码和解析失败的异常
+            if payload.lstrip()[:1] in self.JSON_START_BYTES:
+                try:
+                    json_str = payload.decode('utf-8')
+                    return {
+                        'type': 'json',
+                        'data': json.loads(json_str),
+                        'raw_text': json_str
+                    }
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    pass
             
             # 尝试作为文本解析
             try:
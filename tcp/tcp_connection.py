@@ -12,7 +12,7 @@ import time
 import socket
 import threading
 import logging
-from typing import Dict, Optional, Any, Callable
+from typing import Dict, Optional, Any, Callable, Union
 from datetime import datetime, timezone
 
 # 导入VDA5050协议相关类
@@ -26,6 +26,9 @@ try:
 except ImportError as e:
     logging.warning(f"导入模块失败，某些功能可能不可用: {e}")
 
+# MQTT发布与TCP接收使用的JSON编解码：直接产出/接受UTF-8字节，paho可直接发布字节载荷
+from ._json_backend import dumps_bytes as _json_dumps_bytes, loads as _json_loads
+
 logger = logging.getLogger(__name__)
 
 class RobotConfig:
@@ -93,6 +96,7 @@ class TCPConnectionManager:
         self.last_heartbeat_time = {}
         self.connection_timeout = 30  # 30秒超时
         self.heartbeat_check_interval = 10  # 10秒检查一次心跳
+        self._stop_event = threading.Event()  # 停止信号，用于打断心跳检查间隔的等待
         
         # 消息处理统计
         self.message_stats = {
@@ -106,6 +110,7 @@ class TCPConnectionManager:
         """启动TCP连接监听器"""
         try:
             self.running = True
+            self._stop_event.clear()
             
             # 创建TCP服务器
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -203,8 +208,7 @@ class TCPConnectionManager:
             else:
                 # 简单的JSON解析尝试
                 try:
-                    json_str = data.decode('utf-8')
-                    parsed_data = json.loads(json_str)
+                    parsed_data = _json_loads(data)
                 except:
                     pass
             
@@ -283,7 +287,8 @@ class TCPConnectionManager:
                 if not self.client_connections:
                     self._publish_connection_state("OFFLINE")
                 
-                time.sleep(self.heartbeat_check_interval)
+                # 等待下一次检查，停止时立即返回
+                self._stop_event.wait(self.heartbeat_check_interval)
                 
             except Exception as e:
                 logger.error(f"[ERROR] 心跳监控错误: {e}")
@@ -343,7 +348,7 @@ class TCPConnectionManager:
             topic = f"vda5050/{self.robot_config.vehicle_id}/connection"
             
             # 发布消息
-            self.mqtt_publisher(topic, json.dumps(message_dict, ensure_ascii=False))
+            self.mqtt_publisher(topic, _json_dumps_bytes(message_dict))
             
             logger.info(f"[CONNECTION] 发布连接状态: {self.robot_config.vehicle_id} -> {state}")
             
@@ -365,6 +370,7 @@ class TCPConnectionManager:
         """停止TCP连接监听器"""
         try:
             self.running = False
+            self._stop_event.set()
             
             # 关闭所有客户端连接
             for client_key in list(self.client_connections.keys()):
@@ -432,6 +438,19 @@ class TCPConnectionListener:
             if username and password:
                 self.mqtt_client.username_pw_set(username, password)
             
+            options_config = self.mqtt_config.get("mqtt_options", {})
+            
+            # 断线后由loop_start()的网络线程按指数退避自动重连
+            self.mqtt_client.reconnect_delay_set(
+                min_delay=options_config.get("initial_reconnect_delay", 1),
+                max_delay=options_config.get("max_reconnect_delay", 60)
+            )
+            
+            # 放宽QoS 1/2的在途消息上限，多台AGV同时上下线时，连接状态消息可连续发出而不必逐条等待确认
+            max_inflight = options_config.get("max_inflight_messages")
+            if max_inflight:
+                self.mqtt_client.max_inflight_messages_set(max_inflight)
+            
             # 连接到MQTT服务器
             host = server_config.get("host", "localhost")
             port = server_config.get("port", 1883)
@@ -446,7 +465,7 @@ class TCPConnectionListener:
             logger.error(f"[ERROR] MQTT客户端设置失败: {e}")
             raise
 
-    def _mqtt_publisher(self, topic: str, payload: str):
+    def _mqtt_publisher(self, topic: str, payload: Union[str, bytes]):
         """MQTT消息发布器"""
         try:
             if self.mqtt_client:
@@ -108,6 +108,9 @@ class TCPFactsheetConverter:
             "maxRotationSpeed": 3.14159,
             "supportedDeviation": ["x", "y", "theta"]
         }
+        
+        # 消息头ID和示例数据使用独立的随机数生成器
+        self._rng = random.Random()
 
     def create_factsheet_from_robot_config(self, config_path: str) -> Optional['FactsheetMessage']:
         """从机器人配置文件创建VDA5050 Factsheet消息
@@ -204,7 +207,7 @@ class TCPFactsheetConverter:
             
             # 创建Factsheet消息
             factsheet = FactsheetMessage(
-                header_id=random.randint(100000, 999999),
+                header_id=self._rng.randint(100000, 999999),
                 type_specification=type_specification,
                 physical_parameters=physical_parameters,
                 protocol_limits=protocol_limits,
@@ -328,7 +331,7 @@ class TCPFactsheetConverter:
             
             # 创建Factsheet消息
             factsheet = FactsheetMessage(
-                header_id=random.randint(100000, 999999),
+                header_id=self._rng.randint(100000, 999999),
                 type_specification=type_specification,
                 physical_parameters=physical_parameters,
                 protocol_limits=protocol_limits,
@@ -437,42 +440,47 @@ class TCPFactsheetConverter:
         Returns:
             示例TCP factsheet数据字典
         """
+        # 随机数方法预先绑定为局部变量
+        randint = self._rng.randint
+        uniform = self._rng.uniform
+        choice = self._rng.choice
+        
         if vehicle_id is None:
-            vehicle_id = f"AGV_{random.randint(1, 999):03d}"
+            vehicle_id = f"AGV_{randint(1, 999):03d}"
         
         sample_data = {
             "vehicle_id": vehicle_id,
             "create_on": datetime.now(timezone.utc).isoformat(),
             "manufacturer": "SEER",
-            "model": "AGV_Model_" + random.choice(["A", "B", "C"]),
-            "version": f"v{random.randint(1, 5)}.{random.randint(0, 9)}.{random.randint(0, 9)}",
-            "serial_number": f"SN{random.randint(100000, 999999)}",
+            "model": "AGV_Model_" + choice(["A", "B", "C"]),
+            "version": f"v{randint(1, 5)}.{randint(0, 9)}.{randint(0, 9)}",
+            "serial_number": f"SN{randint(100000, 999999)}",
             
             "type_specification": {
                 "series_name": "SEER_AGV_SERIES",
                 "series_description": "SEER智能搬运机器人系列",
-                "agv_kinematic": random.choice(["DIFF", "OMNI", "THREEWHEEL"]),
-                "agv_class": random.choice(["CARRIER", "TUGGER", "FORKLIFT"]),
-                "max_load_mass": round(random.uniform(50.0, 200.0), 1),
+                "agv_kinematic": choice(["DIFF", "OMNI", "THREEWHEEL"]),
+                "agv_class": choice(["CARRIER", "TUGGER", "FORKLIFT"]),
+                "max_load_mass": round(uniform(50.0, 200.0), 1),
                 "localization_types": ["NATURAL", "REFLECTOR"],
                 "navigation_types": ["AUTONOMOUS"]
             },
             
             "physical_parameters": {
                 "speed_min": 0.0,
-                "speed_max": round(random.uniform(1.5, 3.0), 1),
-                "acceleration_max": round(random.uniform(0.8, 2.0), 1),
-                "deceleration_max": round(random.uniform(1.0, 2.5), 1),
+                "speed_max": round(uniform(1.5, 3.0), 1),
+                "acceleration_max": round(uniform(0.8, 2.0), 1),
+                "deceleration_max": round(uniform(1.0, 2.5), 1),
                 "height_min": 0.1,
-                "height_max": round(random.uniform(1.8, 2.5), 1),
-                "width": round(random.uniform(0.6, 1.2), 1),
-                "length": round(random.uniform(1.0, 2.0), 1)
+                "height_max": round(uniform(1.8, 2.5), 1),
+                "width": round(uniform(0.6, 1.2), 1),
+                "length": round(uniform(1.0, 2.0), 1)
             },
             
             "capabilities": {
                 "supported_actions": ["pick", "drop", "move", "wait", "translate", "turn", "startPause", "stopPause"],
-                "max_payload": round(random.uniform(50, 200), 1),
-                "battery_capacity": round(random.uniform(50, 100), 1),
+                "max_payload": round(uniform(50, 200), 1),
+                "battery_capacity": round(uniform(50, 100), 1),
                 "charging_types": ["automatic", "manual"],
                 "communication_protocols": ["TCP", "MQTT", "HTTP"]
             },
@@ -480,9 +488,9 @@ class TCPFactsheetConverter:
             "safety_features": {
                 "emergency_stop": True,
                 "collision_avoidance": True,
-                "safety_scanners": random.randint(2, 6),
+                "safety_scanners": randint(2, 6),
                 "warning_lights": True,
-                "safety_rated": random.choice(["PLd", "PLe"])
+                "safety_rated": choice(["PLd", "PLe"])
             }
         }
         
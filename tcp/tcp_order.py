@@ -8,14 +8,59 @@ VDA5050订单消息转TCP协议转换器
 import json
 import time
 import math
-from typing import Dict, Any, List, Optional, Union
+from functools import partial
+from operator import itemgetter
+from typing import Dict, Any, List, Optional, Union, Callable, Tuple
 from datetime import datetime
 from .manufacturer_a import ManufacturerATCPProtocol
 
 
+# 平动/转动/托盘旋转动作可携带的运动参数
+_MOTION_PARAM_KEYS = ('distance', 'angle', 'speed', 'direction')
+
+# TCP任务字典模板，生成任务时复制后填入动态字段（字段顺序与协议一致）
+_MOVE_TASK_TEMPLATE = {'source_id': '', 'id': '', 'task_id': ''}
+_SELF_POSITION_TASK_TEMPLATE = {'source_id': 'SELF_POSITION', 'id': 'SELF_POSITION', 'task_id': '', 'operation': ''}
+
+
+def _build_instant_action_dispatch(action_mapping: Dict[str, str],
+                                   action_config: Dict[str, Tuple[int, int]],
+                                   emitters: Dict[str, Callable],
+                                   move_task_emitter: Callable,
+                                   default_emitter: Callable) -> Dict[str, Callable]:
+    """
+    预先构建即时动作分发表：actionType -> 已绑定常量参数的数据格式生成函数
+    
+    只收录同时存在于动作映射表和端口配置表中的动作类型，
+    端口19206、报文3066的动作统一使用move_task_list格式
+    """
+    dispatch = {}
+    for action_type, config in action_config.items():
+        tcp_operation = action_mapping.get(action_type)
+        if tcp_operation is None:
+            continue
+        
+        port, message_type = config
+        if port == 19206 and message_type == 3066:
+            emitter = move_task_emitter
+        else:
+            emitter = emitters.get(action_type, default_emitter)
+        
+        dispatch[action_type] = partial(
+            emitter,
+            action_type=action_type,
+            tcp_operation=tcp_operation,
+            port=port,
+            message_type=message_type
+        )
+    return dispatch
+
+
 class VDA5050ToTCPConverter:
     """VDA5050订单消息转TCP协议转换器"""
     
+    __slots__ = ('tcp_protocol',)
+    
     # VDA5050动作类型到TCP操作的映射表
     VDA5050_TO_TCP_ACTION_MAPPING = {
         'pick': 'JackLoad',           # 托盘抬升
@@ -32,22 +77,22 @@ class VDA5050ToTCPConverter:
         'clearErrors': 'ClearErrors'  # 清除错误
     }
     
-    # VDA5050动作类型到端口号和报文类型的配置表
+    # VDA5050动作类型到(端口号, 报文类型)的配置表
     INSTANT_ACTION_CONFIG = {
-        'pick': {'port': 19206, 'message_type': 3066},           # 托盘抬升
-        'drop': {'port': 19206, 'message_type': 3066},           # 托盘下降
-        'startPause': {'port': 19206, 'message_type': 3002},     # 暂停任务
-        'stopPause': {'port': 19206, 'message_type': 3001},      # 继续任务
-        'cancelOrder': {'port': 19206, 'message_type': 3003},    # 取消订单
-        'reloc': {'port': 19205, 'message_type': 2002},          # 重定位
-        'cancelReloc': {'port': 19205, 'message_type': 2004},    # 取消重定位
-        'clearErrors': {'port': 19207, 'message_type': 4009},    # 清除错误
-        'rotateLoad': {'port': 19206, 'message_type': 3057},     # 托盘旋转
-        'softEmc': {'port': 19210, 'message_type': 6004},        # 软急停
-        'turn': {'port': 19206, 'message_type': 3056},           # 转动
-        'translate': {'port': 19206, 'message_type': 3055},      # 平动
-        'grabAuthority': {'port': 19207, 'message_type': 4005},  # 抢夺控制权
-        'releaseAuthority': {'port': 19207, 'message_type': 4006}  # 释放控制权
+        'pick': (19206, 3066),           # 托盘抬升
+        'drop': (19206, 3066),           # 托盘下降
+        'startPause': (19206, 3002),     # 暂停任务
+        'stopPause': (19206, 3001),      # 继续任务
+        'cancelOrder': (19206, 3003),    # 取消订单
+        'reloc': (19205, 2002),          # 重定位
+        'cancelReloc': (19205, 2004),    # 取消重定位
+        'clearErrors': (19207, 4009),    # 清除错误
+        'rotateLoad': (19206, 3057),     # 托盘旋转
+        'softEmc': (19210, 6004),        # 软急停
+        'turn': (19206, 3056),           # 转动
+        'translate': (19206, 3055),      # 平动
+        'grabAuthority': (19207, 4005),  # 抢夺控制权
+        'releaseAuthority': (19207, 4006)  # 释放控制权
     }
     
     def __init__(self):
@@ -57,13 +102,9 @@ class VDA5050ToTCPConverter:
     def generate_tcp_task_id(self, base_id: str, counter: int) -> str:
         """生成TCP协议task_id，使用统一的ID生成逻辑"""
         if base_id and base_id.strip():
-            # 重置计数器到指定值，然后生成ID
-            original_counter = self.tcp_protocol.task_id_counter
-            self.tcp_protocol.task_id_counter = counter
-            task_id = self.tcp_protocol.generate_task_id(base_id)
-            # 恢复计数器状态
-            self.tcp_protocol.task_id_counter = original_counter
-            return task_id
+            # 与ManufacturerATCPProtocol.generate_task_id的格式保持一致，
+            # 直接按给定计数器拼接，无需改写并恢复协议处理器的计数器状态
+            return f"{base_id}_{counter}"
         
         # 如果没有baseId，使用默认生成逻辑
         return self.tcp_protocol.generate_task_id()
@@ -73,12 +114,13 @@ class VDA5050ToTCPConverter:
         if not actions or not isinstance(actions, list):
             return None
         
-        # 遍历actions数组，查找支持的动作类型
+        # 遍历actions数组，查找支持的动作类型（一次查表同时完成判断和映射）
+        get_operation = self.VDA5050_TO_TCP_ACTION_MAPPING.get
         for action in actions:
-            if isinstance(action, dict) and action.get('actionType'):
-                action_type = action['actionType']
-                if action_type in self.VDA5050_TO_TCP_ACTION_MAPPING:
-                    return self.VDA5050_TO_TCP_ACTION_MAPPING[action_type]
+            if isinstance(action, dict):
+                operation = get_operation(action.get('actionType'))
+                if operation is not None:
+                    return operation
         
         return None
     
@@ -87,18 +129,67 @@ class VDA5050ToTCPConverter:
         if not actions or not isinstance(actions, list):
             return []
         
-        operations = []
-        for action in actions:
-            if isinstance(action, dict) and action.get('actionType'):
-                action_type = action['actionType']
-                if action_type in self.VDA5050_TO_TCP_ACTION_MAPPING:
+        get_operation = self.VDA5050_TO_TCP_ACTION_MAPPING.get
+        try:
+            # 快速路径：反序列化得到的动作均为字典，无需逐项类型检查
+            operations = []
+            for action in actions:
+                operation = get_operation(action.get('actionType'))
+                if operation is not None:
                     operations.append({
-                        'operation': self.VDA5050_TO_TCP_ACTION_MAPPING[action_type],
+                        'operation': operation,
                         'action_id': action.get('actionId', ''),
                         'action_description': action.get('actionDescription', '')
                     })
-        
-        return operations
+            return operations
+        except (AttributeError, TypeError):
+            # 存在非字典动作或不可哈希的actionType时回退到逐项检查，跳过无效项
+            operations = []
+            for action in actions:
+                if not isinstance(action, dict):
+                    continue
+                try:
+                    operation = get_operation(action.get('actionType'))
+                except TypeError:
+                    continue
+                if operation is not None:
+                    operations.append({
+                        'operation': operation,
+                        'action_id': action.get('actionId', ''),
+                        'action_description': action.get('actionDescription', '')
+                    })
+            return operations
+    
+    def _build_node_actions_map(self, nodes: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """创建节点ID到该节点TCP操作列表的映射，只收录带有受支持动作的节点"""
+        extract_operations = self.extract_all_operations_from_actions
+        node_actions_map = {}
+        try:
+            # 快速路径：反序列化得到的节点均为字典，无需逐项类型检查
+            for node in nodes:
+                node_id = node.get('nodeId')
+                actions = node.get('actions')
+                if node_id and actions:
+                    operations = extract_operations(actions)
+                    if operations:
+                        node_actions_map[node_id] = operations
+            return node_actions_map
+        except AttributeError:
+            # 存在非字典节点时回退到逐项检查，跳过无效项
+            return self._build_node_actions_map([node for node in nodes if isinstance(node, dict)])
+    
+    def _build_self_position_tasks(self, operations: List[Dict[str, Any]], order_id_prefix: str,
+                                   first_counter: int) -> List[Dict[str, Any]]:
+        """为每个动作创建一个原地执行的TCP任务，task_id从first_counter开始连续编号"""
+        tasks = []
+        append_task = tasks.append
+        generate_task_id = self.generate_tcp_task_id
+        for counter, action_info in enumerate(operations, first_counter):
+            task = _SELF_POSITION_TASK_TEMPLATE.copy()
+            task['task_id'] = generate_task_id(order_id_prefix, counter)
+            task['operation'] = action_info['operation']
+            append_task(task)
+        return tasks
     
     def convert_vda5050_order_to_tcp_move_task_list(self, vda_json: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -111,111 +202,76 @@ class VDA5050ToTCPConverter:
             }
             
             # 创建节点动作映射（支持多个动作）
-            node_actions_map = {}
-            if 'nodes' in vda_json and isinstance(vda_json['nodes'], list):
-                for node in vda_json['nodes']:
-                    if isinstance(node, dict) and 'actions' in node:
-                        node_id = node.get('nodeId')
-                        if node_id and isinstance(node['actions'], list) and len(node['actions']) > 0:
-                            operations = self.extract_all_operations_from_actions(node['actions'])
-                            if operations:
-                                node_actions_map[node_id] = operations
+            nodes = vda_json.get('nodes')
+            node_actions_map = self._build_node_actions_map(nodes) if isinstance(nodes, list) else {}
             
             # 获取orderId作为task_id前缀
             order_id_prefix = vda_json.get('orderId', 'DEFAULT_ORDER')
             task_id_counter = 1  # 从1开始计数
             
             # 根据edges的sequenceId排序，确定路径执行顺序
+            # 先取出排序键再按元组排序（原始下标保证稳定且避免比较字典），比较时不再调用Python函数
             edges = vda_json.get('edges', [])
             if isinstance(edges, list):
-                sorted_edges = sorted(edges, key=lambda x: x.get('sequenceId', 0))
+                keyed_edges = [(edge.get('sequenceId', 0), index, edge)
+                               for index, edge in enumerate(edges) if isinstance(edge, dict)]
+                keyed_edges.sort()
+                sorted_edges = list(map(itemgetter(2), keyed_edges))
             else:
                 sorted_edges = []
             
+            # 循环内频繁调用的方法预先绑定为局部变量
+            move_task_list = tcp_protocol['move_task_list']
+            append_task = move_task_list.append
+            extend_tasks = move_task_list.extend
+            pop_node_actions = node_actions_map.pop
+            build_self_position_tasks = self._build_self_position_tasks
+            generate_task_id = self.generate_tcp_task_id
+            extract_operations = self.extract_all_operations_from_actions
+            
             # 按边的顺序处理路径
             for edge in sorted_edges:
-                if not isinstance(edge, dict):
-                    continue
-                
                 start_node_id = edge.get('startNodeId')
                 end_node_id = edge.get('endNodeId')
                 
                 if not start_node_id or not end_node_id:
                     continue
                 
-                # 1. 检查起始节点是否有动作需要执行
-                start_node_actions = node_actions_map.get(start_node_id)
+                # 1. 检查起始节点是否有动作需要执行（取出即标记已处理，避免重复）
+                start_node_actions = pop_node_actions(start_node_id, None)
                 if start_node_actions:
-                    # 为每个动作创建一个TCP任务
-                    for action_info in start_node_actions:
-                        tcp_protocol['move_task_list'].append({
-                            'source_id': 'SELF_POSITION',
-                            'id': 'SELF_POSITION',
-                            'task_id': self.generate_tcp_task_id(order_id_prefix, task_id_counter),
-                            'operation': action_info['operation']
-                        })
-                        task_id_counter += 1
-                    # 标记已处理，避免重复
-                    del node_actions_map[start_node_id]
+                    extend_tasks(build_self_position_tasks(
+                        start_node_actions, order_id_prefix, task_id_counter))
+                    task_id_counter += len(start_node_actions)
                 
-                # 2. 添加路径移动任务
-                move_task = {
-                    'source_id': start_node_id,
-                    'id': end_node_id,
-                    'task_id': self.generate_tcp_task_id(order_id_prefix, task_id_counter)
-                }
+                # 2. 添加路径移动任务（边有动作时，先移动再为每个边动作添加原地执行任务）
+                move_task = _MOVE_TASK_TEMPLATE.copy()
+                move_task['source_id'] = start_node_id
+                move_task['id'] = end_node_id
+                move_task['task_id'] = generate_task_id(order_id_prefix, task_id_counter)
+                append_task(move_task)
+                task_id_counter += 1
                 
-                # 检查边本身是否有动作
-                edge_operations = self.extract_all_operations_from_actions(edge.get('actions', []))
+                edge_operations = extract_operations(edge.get('actions', []))
                 if edge_operations:
-                    # 如果边有动作，先添加移动任务（不带动作）
-                    tcp_protocol['move_task_list'].append(move_task)
-                    task_id_counter += 1
-                    
-                    # 然后为每个边动作添加原地执行任务
-                    for action_info in edge_operations:
-                        tcp_protocol['move_task_list'].append({
-                            'source_id': 'SELF_POSITION',
-                            'id': 'SELF_POSITION',
-                            'task_id': self.generate_tcp_task_id(order_id_prefix, task_id_counter),
-                            'operation': action_info['operation']
-                        })
-                        task_id_counter += 1
-                else:
-                    # 如果边没有动作，直接添加移动任务
-                    tcp_protocol['move_task_list'].append(move_task)
-                    task_id_counter += 1
+                    extend_tasks(build_self_position_tasks(
+                        edge_operations, order_id_prefix, task_id_counter))
+                    task_id_counter += len(edge_operations)
             
             # 3. 处理路径结束后的节点动作
             # 找到最后一个边的目标节点，检查是否有动作
             if sorted_edges:
-                last_edge = sorted_edges[-1]
-                if isinstance(last_edge, dict):
-                    end_node_id = last_edge.get('endNodeId')
-                    if end_node_id and end_node_id in node_actions_map:
-                        end_node_actions = node_actions_map[end_node_id]
-                        # 为每个动作创建一个TCP任务
-                        for action_info in end_node_actions:
-                            tcp_protocol['move_task_list'].append({
-                                'source_id': 'SELF_POSITION',
-                                'id': 'SELF_POSITION',
-                                'task_id': self.generate_tcp_task_id(order_id_prefix, task_id_counter),
-                                'operation': action_info['operation']
-                            })
-                            task_id_counter += 1
-                        del node_actions_map[end_node_id]
+                end_node_actions = pop_node_actions(sorted_edges[-1].get('endNodeId'), None)
+                if end_node_actions:
+                    extend_tasks(build_self_position_tasks(
+                        end_node_actions, order_id_prefix, task_id_counter))
+                    task_id_counter += len(end_node_actions)
             
             # 4. 处理剩余的独立节点动作（没有关联到任何边的节点）
-            for node_id, operations in node_actions_map.items():
-                # 为每个动作创建一个TCP任务
-                for action_info in operations:
-                    tcp_protocol['move_task_list'].append({
-                        'source_id': 'SELF_POSITION',
-                        'id': 'SELF_POSITION',
-                        'task_id': self.generate_tcp_task_id(order_id_prefix, task_id_counter),
-                        'operation': action_info['operation']
-                    })
-                    task_id_counter += 1
+            for operations in node_actions_map.values():
+                extend_tasks(build_self_position_tasks(
+                    operations, order_id_prefix, task_id_counter))
+                task_id_counter += len(operations)
             
             return tcp_protocol
             
@@ -235,92 +291,21 @@ class VDA5050ToTCPConverter:
             base_task_id = str(vda_json.get('headerId', '')) if vda_json.get('headerId') else ''
             task_id_counter = 1
             action_results = []
+            dispatch = self._INSTANT_ACTION_DISPATCH
             
             # 处理actions数组，收集有效的动作
             actions = vda_json.get('actions', [])
             if isinstance(actions, list):
                 for action in actions:
-                    if not isinstance(action, dict) or not action.get('actionType'):
+                    if not isinstance(action, dict):
                         continue
                     
-                    action_type = action['actionType']
-                    if action_type not in self.VDA5050_TO_TCP_ACTION_MAPPING:
+                    # 一次查表同时完成动作映射、端口/报文类型配置和数据格式的选择
+                    emit = dispatch.get(action.get('actionType'))
+                    if emit is None:
                         continue
                     
-                    action_config = self.INSTANT_ACTION_CONFIG.get(action_type)
-                    if not action_config:
-                        continue
-                    
-                    tcp_operation = self.VDA5050_TO_TCP_ACTION_MAPPING[action_type]
-                    
-                    # 根据端口号和报文类型决定数据格式
-                    if (action_config['port'] == 19206 and 
-                        action_config['message_type'] == 3066):
-                        # 端口19206，报文3066 - 使用move_task_list格式（pick, drop）
-                        action_result = {
-                            'type': 'move_task_list',
-                            'port': action_config['port'],
-                            'message_type': action_config['message_type'],
-                            'data': {
-                                'move_task_list': [{
-                                    'id': 'SELF_POSITION',
-                                    'source_id': 'SELF_POSITION',
-                                    'task_id': self.generate_tcp_task_id(base_task_id, task_id_counter),
-                                    'operation': tcp_operation
-                                }]
-                            }
-                        }
-                    elif action_type in ['startPause', 'stopPause', 'cancelOrder', 'cancelReloc']:
-                        # 特定动作 - 数据区无内容，只需要端口号和报文类型
-                        action_result = {
-                            'type': 'empty_data',
-                            'port': action_config['port'],
-                            'message_type': action_config['message_type'],
-                            'data': {"__empty_data__": True},
-                            'action_type': action_type,
-                            'description': f"{action_type}（数据区为空）"
-                        }
-                    else:
-                        # 其他动作 - 使用单独字段格式
-                        tcp_data = {}
-                        
-                        # 特殊处理reloc动作，添加重定位参数
-                        if action_type == 'reloc':
-                            if 'isAuto' in action:
-                                tcp_data['isAuto'] = action['isAuto']
-                            if 'home' in action:
-                                tcp_data['home'] = action['home']
-                            if 'length' in action and action['length'] != '':
-                                tcp_data['length'] = float(action['length'])
-                            
-                            # 坐标参数（当isAuto和home都为false时才有效）
-                            if not action.get('isAuto', False) and not action.get('home', False):
-                                if 'x' in action and action['x'] != '':
-                                    tcp_data['x'] = float(action['x'])
-                                if 'y' in action and action['y'] != '':
-                                    tcp_data['y'] = float(action['y'])
-                                if 'angle' in action and action['angle'] != '':
-                                    tcp_data['angle'] = float(action['angle'])
-                        
-                        # 处理其他动作的参数
-                        elif action_type in ['translate', 'turn', 'rotateLoad']:
-                            # 这些动作可能有特定的参数
-                            for key in ['distance', 'angle', 'speed', 'direction']:
-                                if key in action and action[key] != '':
-                                    try:
-                                        tcp_data[key] = float(action[key])
-                                    except (ValueError, TypeError):
-                                        tcp_data[key] = action[key]
-                        
-                        action_result = {
-                            'type': 'single_field',
-                            'port': action_config['port'],
-                            'message_type': action_config['message_type'],
-                            'data': tcp_data,
-                            'action_type': action_type
-                        }
-                    
-                    action_results.append(action_result)
+                    action_results.append(emit(self, action, base_task_id, task_id_counter))
                     task_id_counter += 1
             
             return action_results
@@ -331,6 +316,112 @@ class VDA5050ToTCPConverter:
                 'message': str(e)
             }]
     
+    def _emit_move_task_list(self, action: Dict[str, Any], base_task_id: str, task_id_counter: int,
+                             action_type: str, tcp_operation: str, port: int, message_type: int) -> Dict[str, Any]:
+        """端口19206，报文3066 - 使用move_task_list格式（pick, drop）"""
+        return {
+            'type': 'move_task_list',
+            'port': port,
+            'message_type': message_type,
+            'data': {
+                'move_task_list': [{
+                    'id': 'SELF_POSITION',
+                    'source_id': 'SELF_POSITION',
+                    'task_id': self.generate_tcp_task_id(base_task_id, task_id_counter),
+                    'operation': tcp_operation
+                }]
+            }
+        }
+    
+    def _emit_empty_data(self, action: Dict[str, Any], base_task_id: str, task_id_counter: int,
+                         action_type: str, tcp_operation: str, port: int, message_type: int) -> Dict[str, Any]:
+        """特定动作 - 数据区无内容，只需要端口号和报文类型"""
+        return {
+            'type': 'empty_data',
+            'port': port,
+            'message_type': message_type,
+            'data': {"__empty_data__": True},
+            'action_type': action_type,
+            'description': f"{action_type}（数据区为空）"
+        }
+    
+    def _emit_reloc(self, action: Dict[str, Any], base_task_id: str, task_id_counter: int,
+                    action_type: str, tcp_operation: str, port: int, message_type: int) -> Dict[str, Any]:
+        """重定位动作 - 使用单独字段格式，并添加重定位参数"""
+        tcp_data = {}
+        if 'isAuto' in action:
+            tcp_data['isAuto'] = action['isAuto']
+        if 'home' in action:
+            tcp_data['home'] = action['home']
+        if 'length' in action and action['length'] != '':
+            tcp_data['length'] = float(action['length'])
+        
+        # 坐标参数（当isAuto和home都为false时才有效）
+        if not action.get('isAuto', False) and not action.get('home', False):
+            if 'x' in action and action['x'] != '':
+                tcp_data['x'] = float(action['x'])
+            if 'y' in action and action['y'] != '':
+                tcp_data['y'] = float(action['y'])
+            if 'angle' in action and action['angle'] != '':
+                tcp_data['angle'] = float(action['angle'])
+        
+        return self._emit_single_field(action, base_task_id, task_id_counter,
+                                       action_type, tcp_operation, port, message_type, tcp_data)
+    
+    def _emit_motion(self, action: Dict[str, Any], base_task_id: str, task_id_counter: int,
+                     action_type: str, tcp_operation: str, port: int, message_type: int) -> Dict[str, Any]:
+        """平动/转动/托盘旋转 - 使用单独字段格式，并携带运动参数"""
+        tcp_data = {}
+        get = action.get
+        for key in _MOTION_PARAM_KEYS:
+            value = get(key, '')
+            if value == '':
+                continue
+            # 数值类型直接转换，只有字符串等其他类型才进入异常处理
+            if isinstance(value, (int, float)):
+                tcp_data[key] = float(value)
+            else:
+                try:
+                    tcp_data[key] = float(value)
+                except (ValueError, TypeError):
+                    tcp_data[key] = value
+        
+        return self._emit_single_field(action, base_task_id, task_id_counter,
+                                       action_type, tcp_operation, port, message_type, tcp_data)
+    
+    def _emit_single_field(self, action: Dict[str, Any], base_task_id: str, task_id_counter: int,
+                           action_type: str, tcp_operation: str, port: int, message_type: int,
+                           tcp_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """其他动作 - 使用单独字段格式"""
+        return {
+            'type': 'single_field',
+            'port': port,
+            'message_type': message_type,
+            'data': tcp_data if tcp_data is not None else {},
+            'action_type': action_type
+        }
+    
+    # 即时动作类型到数据格式生成函数的映射（未列出的动作使用单独字段格式）
+    _INSTANT_ACTION_EMITTERS = {
+        'startPause': _emit_empty_data,
+        'stopPause': _emit_empty_data,
+        'cancelOrder': _emit_empty_data,
+        'cancelReloc': _emit_empty_data,
+        'reloc': _emit_reloc,
+        'translate': _emit_motion,
+        'turn': _emit_motion,
+        'rotateLoad': _emit_motion,
+    }
+    
+    # 动作映射表与端口/报文类型配置表融合后的分发表，类定义时预先构建
+    _INSTANT_ACTION_DISPATCH = _build_instant_action_dispatch(
+        VDA5050_TO_TCP_ACTION_MAPPING,
+        INSTANT_ACTION_CONFIG,
+        _INSTANT_ACTION_EMITTERS,
+        _emit_move_task_list,
+        _emit_single_field
+    )
+    
     def convert_order_message_to_tcp(self, order_message) -> Dict[str, Any]:
         """
         将VDA5050 OrderMessage对象转换为TCP格式
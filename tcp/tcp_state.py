@@ -8,7 +8,7 @@ import json
 import time
 import sys
 import os
-from datetime import datetime, timezone
+from functools import partial
 from typing import Dict, Any, List, Optional
 
 # 添加父目录到路径以便导入vda5050模块
@@ -18,11 +18,56 @@ from vda5050.state_message import (
     StateMessage, NodeState, EdgeState, ActionState, 
     BatteryState, Error, SafetyState, NodePosition, MapInfo
 )
+from tcp._timestamp import utc_now_iso as _utc_now_iso
+
+# 设备错误/警告构造器，固定错误类型和级别
+_make_device_error = partial(Error, error_type="DEVICE_ERROR", error_level="FATAL")
+_make_device_warning = partial(Error, error_type="DEVICE_WARNING", error_level="WARNING")
+
+# 操作模式真值表，下标为 急停<<2 | 软急停<<1 | 充电
+_OPERATING_MODE_TABLE = (
+    "AUTOMATIC", "SERVICE", "SEMIAUTOMATIC", "SEMIAUTOMATIC",
+    "EMERGENCY", "EMERGENCY", "EMERGENCY", "EMERGENCY"
+)
+
+# 载荷信息参数：(loadId, loadType, loadPosition, (长, 宽, 高))
+_FORK_LOAD_SPEC = ("fork_load", "PALLET", "FORK", (1.2, 0.8, 0.1))
+_JACK_LOAD_SPEC = ("jack_load", "RACK", "JACK", (1.0, 1.0, 0.05))
+
+# 信息条目模板：类型和级别固定，只需补充描述
+_LOCALIZATION_INFO_TEMPLATE = {"infoType": "LOCALIZATION", "infoLevel": "INFO"}
+_NETWORK_INFO_TEMPLATE = {"infoType": "NETWORK", "infoLevel": "INFO"}
+_STATISTICS_INFO_TEMPLATE = {"infoType": "STATISTICS", "infoLevel": "INFO"}
+
+
+def _make_load(spec: tuple) -> Dict[str, Any]:
+    """按载荷参数创建载荷记录（含嵌套字典在内每次新建，不与其他记录共享）"""
+    load_id, load_type, load_position, (length, width, height) = spec
+    return {
+        "loadId": load_id,
+        "loadType": load_type,
+        "loadPosition": load_position,
+        "boundingBoxReference": {"x": 0, "y": 0, "z": 0, "theta": 0},
+        "loadDimensions": {"length": length, "width": width, "height": height},
+        "weight": 0.0
+    }
+
+
+def _map_info_for(map_id: str) -> MapInfo:
+    """创建状态消息中的地图信息（每条消息独立一份，避免修改时影响其他消息）"""
+    return MapInfo(
+        map_id=map_id,
+        map_version="1.0.0",
+        map_status="ENABLED",
+        map_description="AGV当前运行地图"
+    )
 
 
 class AGVToVDA5050Converter:
     """AGV推送数据到VDA5050状态消息转换器"""
     
+    __slots__ = ('last_order_id', 'last_order_update_id', 'last_node_id', 'last_node_sequence_id')
+    
     def __init__(self):
         self.last_order_id = ""
         self.last_order_update_id = 0
@@ -40,42 +85,44 @@ class AGVToVDA5050Converter:
             StateMessage: VDA5050标准状态消息
         """
         # 获取当前时间戳
-        current_time = datetime.now(timezone.utc).isoformat()
+        current_time = _utc_now_iso()
         
-        # 提取基本信息
-        vehicle_id = agv_data.get('vehicle_id', 'AGV_001')
-        current_map = agv_data.get('current_map', 'default_map')
+        # 一次性绑定字典查找，提取基本信息和数值字段
+        get = agv_data.get
+        vehicle_id = get('vehicle_id', 'AGV_001')
+        current_map = get('current_map', 'default_map')
+        x = get('x')
+        y = get('y')
+        vx = get('vx')
+        vy = get('vy')
+        w = get('w')
         
         # 创建地图信息
-        maps = [MapInfo(
-            map_id=current_map,
-            map_version="1.0.0",
-            map_status="ENABLED",
-            map_description="AGV当前运行地图"
-        )]
+        maps = [_map_info_for(current_map)]
         
         # 创建AGV位置信息
         agv_position = None
-        if 'x' in agv_data and 'y' in agv_data:
+        if x is not None and y is not None:
+            angle = get('angle')
             agv_position = NodePosition(
-                x=float(agv_data.get('x', 0.0)),
-                y=float(agv_data.get('y', 0.0)),
-                theta=float(agv_data.get('angle', 0.0)),
+                x=float(x),
+                y=float(y),
+                theta=float(angle) if angle is not None else 0.0,
                 map_id=current_map
             )
         
         # 创建速度信息
         velocity = None
-        if any(key in agv_data for key in ['vx', 'vy', 'w']):
+        if vx is not None or vy is not None or w is not None:
             velocity = {
-                "vx": float(agv_data.get('vx', 0.0)),
-                "vy": float(agv_data.get('vy', 0.0)),
-                "omega": float(agv_data.get('w', 0.0))
+                "vx": float(vx) if vx is not None else 0.0,
+                "vy": float(vy) if vy is not None else 0.0,
+                "omega": float(w) if w is not None else 0.0
             }
         
         # 创建节点状态
         node_states = []
-        current_station = agv_data.get('current_station', '')
+        current_station = get('current_station', '')
         if current_station:
             node_state = NodeState(
                 node_id=str(current_station),
@@ -91,12 +138,12 @@ class AGVToVDA5050Converter:
         edge_states = []
         
         # 判断是否在行驶
-        is_driving = not agv_data.get('is_stop', True)
+        is_driving = not get('is_stop', True)
         
         # 创建动作状态
         action_states = []
-        task_status = agv_data.get('task_status', 'IDLE')
-        task_type = agv_data.get('task_type', 'NONE')
+        task_status = get('task_status', 'IDLE')
+        task_type = get('task_type', 'NONE')
         
         if task_type != 'NONE':
             action_status = self._convert_task_status_to_action_status(task_status)
@@ -111,40 +158,21 @@ class AGVToVDA5050Converter:
         
         # 创建电池状态
         battery_state = BatteryState(
-            battery_charge=float(agv_data.get('battery_level', 0.0)),
-            battery_voltage=agv_data.get('voltage'),
+            battery_charge=float(get('battery_level', 0.0)),
+            battery_voltage=get('voltage'),
             battery_health=None,  # AGV数据中没有电池健康状态
-            charging=agv_data.get('charging', False),
+            charging=get('charging', False),
             reach=None  # AGV数据中没有剩余里程信息
         )
         
-        # 创建错误列表
-        errors = []
-        agv_errors = agv_data.get('errors', [])
-        agv_warnings = agv_data.get('warnings', [])
-        
-        # 处理错误
-        for error in agv_errors:
-            vda_error = Error(
-                error_type="DEVICE_ERROR",
-                error_level="FATAL",
-                error_description=str(error)
-            )
-            errors.append(vda_error)
-        
-        # 处理警告
-        for warning in agv_warnings:
-            vda_warning = Error(
-                error_type="DEVICE_WARNING", 
-                error_level="WARNING",
-                error_description=str(warning)
-            )
-            errors.append(vda_warning)
+        # 创建错误列表（先错误后警告）
+        errors = [_make_device_error(error_description=str(error)) for error in get('errors', [])]
+        errors.extend(_make_device_warning(error_description=str(warning)) for warning in get('warnings', []))
         
         # 创建安全状态
-        emergency = agv_data.get('emergency', False)
-        soft_emc = agv_data.get('soft_emc', False)
-        blocked = agv_data.get('blocked', False)
+        emergency = get('emergency', False)
+        soft_emc = get('soft_emc', False)
+        blocked = get('blocked', False)
         
         # 确定E-Stop状态
         e_stop = "TRIGGERED" if (emergency or soft_emc) else "AUTOACK"
@@ -179,9 +207,9 @@ class AGVToVDA5050Converter:
             serial_number=vehicle_id,
             maps=maps,
             zone_set_id=None,
-            paused=agv_data.get('is_stop', False),
+            paused=get('is_stop', False),
             new_base_request=None,
-            distance_since_last_node=agv_data.get('target_dist'),
+            distance_since_last_node=get('target_dist'),
             agv_position=agv_position,
             velocity=velocity,
             loads=self._create_loads_info(agv_data),
@@ -203,15 +231,10 @@ class AGVToVDA5050Converter:
         return status_mapping.get(task_status.upper(), 'WAITING')
     
     def _determine_operating_mode(self, agv_data: Dict[str, Any]) -> str:
-        """根据AGV数据确定操作模式"""
-        if agv_data.get('emergency', False):
-            return "EMERGENCY"
-        elif agv_data.get('soft_emc', False):
-            return "SEMIAUTOMATIC"
-        elif agv_data.get('charging', False):
-            return "SERVICE"
-        else:
-            return "AUTOMATIC"
+        """根据AGV数据确定操作模式（优先级：急停 > 软急停 > 充电 > 自动）"""
+        get = agv_data.get
+        index = (bool(get('emergency', False)) << 2) | (bool(get('soft_emc', False)) << 1) | bool(get('charging', False))
+        return _OPERATING_MODE_TABLE[index]
     
     def _create_loads_info(self, agv_data: Dict[str, Any]) -> Optional[List[Dict]]:
         """创建载荷信息"""
@@ -219,27 +242,11 @@ class AGVToVDA5050Converter:
         
         # 检查货叉状态
         if 'fork' in agv_data:
-            fork_info = {
-                "loadId": "fork_load",
-                "loadType": "PALLET", 
-                "loadPosition": "FORK",
-                "boundingBoxReference": {"x": 0, "y": 0, "z": 0, "theta": 0},
-                "loadDimensions": {"length": 1.2, "width": 0.8, "height": 0.1},
-                "weight": 0.0
-            }
-            loads.append(fork_info)
+            loads.append(_make_load(_FORK_LOAD_SPEC))
         
         # 检查顶升状态
         if 'jack' in agv_data:
-            jack_info = {
-                "loadId": "jack_load",
-                "loadType": "RACK",
-                "loadPosition": "JACK", 
-                "boundingBoxReference": {"x": 0, "y": 0, "z": 0, "theta": 0},
-                "loadDimensions": {"length": 1.0, "width": 1.0, "height": 0.05},
-                "weight": 0.0
-            }
-            loads.append(jack_info)
+            loads.append(_make_load(_JACK_LOAD_SPEC))
             
         return loads if loads else None
     
@@ -249,20 +256,14 @@ class AGVToVDA5050Converter:
         
         # 添加定位信息
         if 'confidence' in agv_data:
-            info = {
-                "infoType": "LOCALIZATION",
-                "infoLevel": "INFO",
-                "infoDescription": f"定位置信度: {agv_data['confidence']}"
-            }
+            info = _LOCALIZATION_INFO_TEMPLATE.copy()
+            info["infoDescription"] = f"定位置信度: {agv_data['confidence']}"
             information.append(info)
         
         # 添加网络信息
         if 'ssid' in agv_data and 'rssi' in agv_data:
-            info = {
-                "infoType": "NETWORK",
-                "infoLevel": "INFO", 
-                "infoDescription": f"WiFi: {agv_data['ssid']}, 信号强度: {agv_data['rssi']}dBm"
-            }
+            info = _NETWORK_INFO_TEMPLATE.copy()
+            info["infoDescription"] = f"WiFi: {agv_data['ssid']}, 信号强度: {agv_data['rssi']}dBm"
             information.append(info)
         
         # 添加温度信息
@@ -277,11 +278,8 @@ class AGVToVDA5050Converter:
         
         # 添加里程信息
         if 'odo' in agv_data:
-            info = {
-                "infoType": "STATISTICS",
-                "infoLevel": "INFO",
-                "infoDescription": f"累计里程: {agv_data['odo']}m"
-            }
+            info = _STATISTICS_INFO_TEMPLATE.copy()
+            info["infoDescription"] = f"累计里程: {agv_data['odo']}m"
             information.append(info)
             
         return information if information else None
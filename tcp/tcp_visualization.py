@@ -11,27 +11,156 @@ TCP状态数据转VDA5050可视化消息转换器
 """
 
 import json
-import math
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Union, Tuple
 from datetime import datetime, timezone
+from functools import lru_cache
 import sys
 import os
+import time
 import logging
 
-# 添加父目录到Python路径，以便导入vda5050模块
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 添加父目录到Python路径，以便导入vda5050模块（已存在时不重复添加）
+_PARENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PARENT_DIR not in sys.path:
+    sys.path.append(_PARENT_DIR)
 
 from vda5050.visualization_message import VisualizationMessage, AGVPosition, Velocity
+from tcp._json_backend import dumps_pretty as _dumps_pretty, loads as _loads
+from tcp._timestamp import utc_now_iso_seconds as _now_iso
+
+__all__ = [
+    "TCP_STATE_PORT",
+    "STATE_MESSAGE_TYPE",
+    "TCPStateToVisualizationConverter",
+    "visualization_converter",
+    "convert_tcp_state_to_visualization_json",
+    "create_sample_tcp_state",
+    "create_sample_tcp_state_minimal"
+]
 
 # 配置常量
-TCP_STATE_PORT = 19301      # AGV状态上报端口
-STATE_MESSAGE_TYPE = 9300   # 状态数据报文类型
+TCP_STATE_PORT = 19301             # AGV状态上报端口
+STATE_MESSAGE_TYPE = 9300          # 状态数据报文类型
+VISUALIZATION_VERSION = "2.0.0"    # VDA5050协议版本
+DEFAULT_MANUFACTURER = "TCP_AGV"   # 默认制造商
+UNKNOWN_MAP_ID = "unknown_map"     # 缺少current_map时使用的地图ID
+
+# Python 3.11起datetime.fromisoformat可直接解析'Z'后缀
+_FROMISOFORMAT_ACCEPTS_Z = sys.version_info >= (3, 11)
+_fromisoformat = datetime.fromisoformat
+_UTC = timezone.utc
+
+# json.loads产出的数值类型，按精确类型做一次哈希查找（bool不视为数值）
+_NUMERIC_TYPES = frozenset((int, float))
+
+# 可视化相关字段概要的分组及各组字段
+_VISUALIZATION_FIELD_SECTIONS = (
+    ("basic_info", ("vehicle_id", "create_on", "current_map")),
+    ("position", ("x", "y", "angle", "confidence")),
+    ("velocity", ("vx", "vy", "w", "is_stop")),
+    ("navigation", ("current_station", "target_id", "target_dist", "task_status")),
+)
 
 logger = logging.getLogger(__name__)
 
+# 同一车辆同一类字段异常告警的最小输出间隔（秒）
+WARNING_RATE_LIMIT_INTERVAL = 1.0
+# 限流记录的条目上限，超出时清理已过时间窗口的条目
+WARNING_RATE_LIMIT_MAX_KEYS = 1024
+
+# 未携带车辆ID的日志记录不参与限流
+_NOT_RATE_LIMITED = object()
+
+
+class _WarningRateLimitFilter(logging.Filter):
+    """字段异常告警限流：同一车辆的同一告警模板在时间窗口内只输出一次，避免异常数据高频上报时刷屏
+    
+    只处理通过extra携带vehicle_id的告警，其他日志（包括其他告警）原样放行
+    """
+    
+    def __init__(self, interval: float = WARNING_RATE_LIMIT_INTERVAL,
+                 max_keys: int = WARNING_RATE_LIMIT_MAX_KEYS):
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._last_emitted: Dict[Tuple[str, Any], float] = {}
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        vehicle_id = getattr(record, 'vehicle_id', _NOT_RATE_LIMITED)
+        if vehicle_id is _NOT_RATE_LIMITED or record.levelno != logging.WARNING:
+            return True
+        
+        # 告警使用%s惰性格式化，record.msg即为不含具体数值的模板
+        key = (record.msg, vehicle_id)
+        now = time.monotonic()
+        try:
+            last = self._last_emitted.get(key)
+        except TypeError:
+            # 异常数据中的车辆ID不可哈希时不做限流
+            return True
+        if last is not None and now - last < self.interval:
+            return False
+        
+        if last is None and len(self._last_emitted) >= self.max_keys:
+            self._prune(now)
+        self._last_emitted[key] = now
+        return True
+    
+    def _prune(self, now: float):
+        """清理已过时间窗口的条目；仍超出上限时全部清空，保证记录不会无限增长"""
+        deadline = now - self.interval
+        last_emitted = {key: ts for key, ts in self._last_emitted.items() if ts > deadline}
+        if len(last_emitted) >= self.max_keys:
+            last_emitted = {}
+        self._last_emitted = last_emitted
+
+
+logger.addFilter(_WarningRateLimitFilter())
+
+
+def _parse_iso8601(timestamp_str: str) -> datetime:
+    """解析ISO8601时间戳，'Z'后缀按UTC处理，仅在旧版本Python上才切片去除后缀"""
+    if _FROMISOFORMAT_ACCEPTS_Z or timestamp_str[-1] != 'Z':
+        return _fromisoformat(timestamp_str)
+    return _fromisoformat(timestamp_str[:-1]).replace(tzinfo=_UTC)
+
+
+# 时间戳解析失败时可能抛出的异常
+_TIMESTAMP_PARSE_ERRORS = (ValueError, TypeError, OverflowError, OSError)
+
+
+@lru_cache(maxsize=1024)
+def _parse_create_on(timestamp_str: str) -> Tuple[int, str]:
+    """解析TCP时间戳，一次解析同时得到headerId和ISO8601字符串
+    
+    连续上报的状态数据经常携带相同的时间戳，结果按原始字符串缓存；
+    无法解析时直接抛出异常，lru_cache不缓存异常，因此失败结果不会占用缓存
+    
+    Args:
+        timestamp_str: 非空的TCP时间戳字符串（ISO格式或Unix时间戳）
+        
+    Returns:
+        (header_id, iso8601字符串)
+        
+    Raises:
+        _TIMESTAMP_PARSE_ERRORS中的异常：时间戳无法解析
+    """
+    if 'T' in timestamp_str:
+        # ISO格式时间戳
+        dt = _parse_iso8601(timestamp_str)
+        return int(dt.timestamp() * 1000) % 2147483647, dt.isoformat()
+    
+    # 假设是Unix时间戳
+    seconds = float(timestamp_str)
+    dt = datetime.fromtimestamp(seconds, tz=_UTC)
+    return int(seconds * 1000) % 2147483647, dt.isoformat()
+
+
 class TCPStateToVisualizationConverter:
     """TCP状态数据转VDA5050可视化消息转换器"""
     
+    __slots__ = ()
+    
     def __init__(self):
         """初始化转换器"""
         pass
@@ -40,10 +169,12 @@ class TCPStateToVisualizationConverter:
         """将TCP状态数据转换为VDA5050可视化消息
         
         处理流程：
-        1. 验证TCP状态数据（端口19301，报文类型9300）
-        2. 提取位置信息（x, y, angle）转换为AGVPosition
-        3. 提取速度信息（vx, vy, w）转换为Velocity
-        4. 生成VDA5050标准的可视化消息
+        1. 提取位置信息（x, y, angle）转换为AGVPosition
+        2. 提取速度信息（vx, vy, w）转换为Velocity
+        3. 生成VDA5050标准的可视化消息
+        
+        桥接服务已按端口19301分流状态数据，此处不再校验报文类型；
+        来源不确定的数据请使用convert_tcp_state_to_visualization_checked
         
         Args:
             tcp_state: TCP状态数据字典，应包含：
@@ -56,16 +187,12 @@ class TCPStateToVisualizationConverter:
         Returns:
             VDA5050可视化消息对象
         """
-        # 验证数据来源（可选验证）
-        message_type = tcp_state.get('messageType')
-        if message_type and message_type != STATE_MESSAGE_TYPE:
-            logger.warning(f"[WARNING] 数据报文类型 {message_type} 与期望的状态报文类型 {STATE_MESSAGE_TYPE} 不匹配")
+        get = tcp_state.get
         
         # 提取基础消息字段
-        header_id = self._generate_header_id_from_timestamp(tcp_state.get('create_on'))
-        timestamp = self._convert_tcp_timestamp_to_iso8601(tcp_state.get('create_on'))
-        manufacturer = "TCP_AGV"  # 默认制造商
-        serial_number = tcp_state.get('vehicle_id', '')
+        header_id, timestamp = self._parse_ts(get('create_on'))
+        manufacturer = DEFAULT_MANUFACTURER
+        serial_number = get('vehicle_id', '')
         
         # 提取AGV位置信息
         agv_position = self._extract_agv_position(tcp_state)
@@ -74,18 +201,44 @@ class TCPStateToVisualizationConverter:
         velocity = self._extract_velocity(tcp_state)
         
         # 创建可视化消息
+        # 按位置参数构造：header_id, timestamp, version, manufacturer, serial_number, agv_position, velocity
         visualization_msg = VisualizationMessage(
-            header_id=header_id,
-            timestamp=timestamp,
-            version="2.0.0",
-            manufacturer=manufacturer,
-            serial_number=serial_number,
-            agv_position=agv_position,
-            velocity=velocity
+            header_id, timestamp, VISUALIZATION_VERSION, manufacturer, serial_number, agv_position, velocity
         )
         
         return visualization_msg
     
+    def convert_tcp_state_to_visualization_checked(self, tcp_state: Dict[str, Any]) -> VisualizationMessage:
+        """校验报文类型后将TCP状态数据转换为VDA5050可视化消息
+        
+        报文类型与状态报文类型（9300）不一致时仅输出警告，仍然生成可视化消息
+        
+        Args:
+            tcp_state: TCP状态数据字典
+            
+        Returns:
+            VDA5050可视化消息对象
+        """
+        message_type = tcp_state.get('messageType')
+        if message_type not in (None, STATE_MESSAGE_TYPE):
+            logger.warning("[WARNING] 数据报文类型 %s 与期望的状态报文类型 %s 不匹配", message_type, STATE_MESSAGE_TYPE)
+        
+        return self.convert_tcp_state_to_visualization(tcp_state)
+    
+    def convert_batch(self, tcp_states: List[Dict[str, Any]]) -> List[VisualizationMessage]:
+        """批量将TCP状态数据转换为VDA5050可视化消息
+        
+        用于日志回放或多车集中上报等场景，转换方法只查找一次
+        
+        Args:
+            tcp_states: TCP状态数据字典列表
+            
+        Returns:
+            与输入顺序一致的VDA5050可视化消息列表
+        """
+        convert = self.convert_tcp_state_to_visualization
+        return [convert(tcp_state) for tcp_state in tcp_states]
+    
     def _extract_agv_position(self, tcp_state: Dict[str, Any]) -> Optional[AGVPosition]:
         """从TCP状态数据中提取AGV位置信息
         
@@ -103,59 +256,59 @@ class TCPStateToVisualizationConverter:
         Returns:
             AGV位置对象，如果数据不完整则返回None
         """
+        get = tcp_state.get
+        
         # 尝试从嵌套的position字段中提取位置信息（AGV模拟器格式）
-        position_data = tcp_state.get('position')
-        if position_data and isinstance(position_data, dict):
+        position_data = get('position')
+        if type(position_data) is dict and position_data:
             x = position_data.get('x')
             y = position_data.get('y')
             angle = position_data.get('theta')  # AGV模拟器使用'theta'字段
         else:
             # 回退到扁平结构（原有格式兼容）
-            x = tcp_state.get('x')
-            y = tcp_state.get('y')
-            angle = tcp_state.get('angle') or tcp_state.get('theta')
+            x = get('x')
+            y = get('y')
+            angle = get('angle') or get('theta')
         
-        current_map = tcp_state.get('current_map')
+        current_map = get('current_map')
         
         # 检查位置信息的完整性
         if x is None or y is None or angle is None:
-            logger.warning(f"[WARNING] 位置信息不完整：x={x}, y={y}, angle={angle}")
+            logger.warning("[WARNING] 位置信息不完整：x=%s, y=%s, angle=%s", x, y, angle, extra={'vehicle_id': get('vehicle_id')})
             # 使用默认值
             x = x or 0.0
             y = y or 0.0
             angle = angle or 0.0
         
         # 角度值验证和转换
-        if not isinstance(angle, (int, float)):
-            logger.warning(f"[WARNING] 无效的角度值：{angle}")
+        if type(angle) not in _NUMERIC_TYPES:
+            logger.warning("[WARNING] 无效的角度值：%s", angle, extra={'vehicle_id': get('vehicle_id')})
             angle = 0.0
         
-        # 确保角度在0-360范围内
-        angle = angle % 360
+        # 确保角度在0-360范围内（已在范围内的常见情况跳过浮点取模）
+        if not 0 < angle < 360:
+            angle = angle % 360
         
         # 确定位置是否已初始化
         position_initialized = True  # 如果有位置数据，认为已初始化
         
         # 获取定位置信度（VDA5050要求范围0.0-1.0）
-        localization_score = tcp_state.get('confidence')
+        localization_score = get('confidence')
         if localization_score is not None:
-            if not isinstance(localization_score, (int, float)) or localization_score < 0 or localization_score > 1:
-                logger.warning(f"[WARNING] 无效的置信度值：{localization_score}")
+            # 分别比较上下界：NaN与任何值比较均为False，按原有行为原样保留
+            if type(localization_score) not in _NUMERIC_TYPES or localization_score < 0 or localization_score > 1:
+                logger.warning("[WARNING] 无效的置信度值：%s", localization_score, extra={'vehicle_id': get('vehicle_id')})
                 localization_score = 0.5  # 默认值
         
         # 获取偏差范围（如果有的话）
-        deviation_range = tcp_state.get('deviation_range')
-        if deviation_range is not None and not isinstance(deviation_range, (int, float)):
+        deviation_range = get('deviation_range')
+        if deviation_range is not None and type(deviation_range) not in _NUMERIC_TYPES:
             deviation_range = None
         
+        # 按位置参数构造：x, y, theta, map_id, position_initialized, localization_score, deviation_range
         return AGVPosition(
-            x=float(x),
-            y=float(y),
-            theta=float(angle),
-            map_id=current_map or "unknown_map",
-            position_initialized=position_initialized,
-            localization_score=localization_score,
-            deviation_range=deviation_range
+            float(x), float(y), float(angle), current_map or UNKNOWN_MAP_ID,
+            position_initialized, localization_score, deviation_range
         )
     
     def _extract_velocity(self, tcp_state: Dict[str, Any]) -> Optional[Velocity]:
@@ -172,29 +325,31 @@ class TCPStateToVisualizationConverter:
         Returns:
             速度对象，如果没有速度数据则返回None
         """
+        get = tcp_state.get
+        
         # 尝试从嵌套的velocity字段中提取速度信息（AGV模拟器格式）
-        velocity_data = tcp_state.get('velocity')
-        if velocity_data and isinstance(velocity_data, dict):
+        velocity_data = get('velocity')
+        if type(velocity_data) is dict and velocity_data:
             vx = velocity_data.get('vx')
             vy = velocity_data.get('vy')
             w = velocity_data.get('omega')  # AGV模拟器使用'omega'字段
         else:
             # 回退到扁平结构（原有格式兼容）
-            vx = tcp_state.get('vx')
-            vy = tcp_state.get('vy')
-            w = tcp_state.get('w') or tcp_state.get('omega')
+            vx = get('vx')
+            vy = get('vy')
+            w = get('w') or get('omega')
         
         # 速度验证
-        if vx is not None and not isinstance(vx, (int, float)):
-            logger.warning(f"[WARNING] 无效的vx值：{vx}")
+        if vx is not None and type(vx) not in _NUMERIC_TYPES:
+            logger.warning("[WARNING] 无效的vx值：%s", vx, extra={'vehicle_id': get('vehicle_id')})
             vx = 0.0
         
-        if vy is not None and not isinstance(vy, (int, float)):
-            logger.warning(f"[WARNING] 无效的vy值：{vy}")
+        if vy is not None and type(vy) not in _NUMERIC_TYPES:
+            logger.warning("[WARNING] 无效的vy值：%s", vy, extra={'vehicle_id': get('vehicle_id')})
             vy = 0.0
         
-        if w is not None and not isinstance(w, (int, float)):
-            logger.warning(f"[WARNING] 无效的角速度值：{w}")
+        if w is not None and type(w) not in _NUMERIC_TYPES:
+            logger.warning("[WARNING] 无效的角速度值：%s", w, extra={'vehicle_id': get('vehicle_id')})
             w = 0.0
         
         # 如果没有任何速度数据，返回None
@@ -202,62 +357,25 @@ class TCPStateToVisualizationConverter:
             return None
         
         # 使用默认值0.0而不是None，以避免后续处理错误
-        return Velocity(
-            vx=vx or 0.0,
-            vy=vy or 0.0,
-            omega=w or 0.0
-        )
+        return Velocity(vx or 0.0, vy or 0.0, w or 0.0)
     
-    def _generate_header_id_from_timestamp(self, timestamp_str: Optional[str]) -> int:
-        """从时间戳生成headerId
-        
-        Args:
-            timestamp_str: 时间戳字符串
-            
-        Returns:
-            生成的header ID
-        """
-        if not timestamp_str:
-            return int(datetime.now().timestamp() * 1000) % 2147483647
-        
-        try:
-            # 尝试解析时间戳并转换为整数
-            if 'T' in timestamp_str:
-                # ISO格式时间戳
-                dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                return int(dt.timestamp() * 1000) % 2147483647
-            else:
-                # 假设是Unix时间戳
-                return int(float(timestamp_str) * 1000) % 2147483647
-        except (ValueError, TypeError):
-            # 如果解析失败，使用当前时间
-            return int(datetime.now().timestamp() * 1000) % 2147483647
-    
-    def _convert_tcp_timestamp_to_iso8601(self, timestamp_str: Optional[str]) -> str:
-        """将TCP时间戳转换为ISO8601格式
+    def _parse_ts(self, timestamp_str: Optional[str]) -> Tuple[int, str]:
+        """解析TCP时间戳，同时生成headerId和ISO8601时间戳
         
         Args:
             timestamp_str: TCP时间戳字符串
             
         Returns:
-            ISO8601格式的时间戳字符串
+            (header_id, ISO8601格式的时间戳字符串)，无法解析时使用当前时间
         """
-        if not timestamp_str:
-            return datetime.now(timezone.utc).isoformat()
-        
-        try:
-            # 尝试多种时间戳格式
-            if 'T' in timestamp_str:
-                # 已经是ISO格式，可能需要标准化
-                dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                return dt.isoformat()
-            else:
-                # 假设是Unix时间戳
-                dt = datetime.fromtimestamp(float(timestamp_str), tz=timezone.utc)
-                return dt.isoformat()
-        except (ValueError, TypeError):
-            # 如果解析失败，使用当前时间
-            return datetime.now(timezone.utc).isoformat()
+        if timestamp_str and isinstance(timestamp_str, str):
+            try:
+                return _parse_create_on(timestamp_str)
+            except _TIMESTAMP_PARSE_ERRORS:
+                pass
+        
+        # 如果没有时间戳或解析失败，使用当前时间
+        return time.time_ns() // 1_000_000 % 2147483647, _now_iso()
     
     def convert_to_json(self, tcp_state: Dict[str, Any]) -> str:
         """将TCP状态数据转换为VDA5050可视化消息的JSON字符串
@@ -269,7 +387,7 @@ class TCPStateToVisualizationConverter:
             VDA5050可视化消息的JSON字符串
         """
         visualization_msg = self.convert_tcp_state_to_visualization(tcp_state)
-        return json.dumps(visualization_msg.get_message_dict(), indent=2, ensure_ascii=False)
+        return _dumps_pretty(visualization_msg.get_message_dict())
     
     def extract_visualization_fields(self, tcp_state: Dict[str, Any]) -> Dict[str, Any]:
         """从TCP状态数据中提取可视化相关字段的概要信息
@@ -280,31 +398,9 @@ class TCPStateToVisualizationConverter:
         Returns:
             包含可视化相关字段概要的字典
         """
-        return {
-            "basic_info": {
-                "vehicle_id": tcp_state.get('vehicle_id'),
-                "create_on": tcp_state.get('create_on'),
-                "current_map": tcp_state.get('current_map')
-            },
-            "position": {
-                "x": tcp_state.get('x'),
-                "y": tcp_state.get('y'),
-                "angle": tcp_state.get('angle'),
-                "confidence": tcp_state.get('confidence')
-            },
-            "velocity": {
-                "vx": tcp_state.get('vx'),
-                "vy": tcp_state.get('vy'),
-                "w": tcp_state.get('w'),
-                "is_stop": tcp_state.get('is_stop')
-            },
-            "navigation": {
-                "current_station": tcp_state.get('current_station'),
-                "target_id": tcp_state.get('target_id'),
-                "target_dist": tcp_state.get('target_dist'),
-                "task_status": tcp_state.get('task_status')
-            }
-        }
+        get = tcp_state.get
+        return {section: {key: get(key) for key in keys}
+                for section, keys in _VISUALIZATION_FIELD_SECTIONS}
     
     def is_position_valid(self, tcp_state: Dict[str, Any]) -> bool:
         """检查TCP状态数据中的位置信息是否有效
@@ -319,9 +415,9 @@ class TCPStateToVisualizationConverter:
         y = tcp_state.get('y')
         angle = tcp_state.get('angle')
         
-        return (x is not None and y is not None and angle is not None and
-                isinstance(x, (int, float)) and isinstance(y, (int, float)) and
-                isinstance(angle, (int, float)))
+        # None的类型不在数值类型集合中，无需单独判断
+        numeric_types = _NUMERIC_TYPES
+        return type(x) in numeric_types and type(y) in numeric_types and type(angle) in numeric_types
     
     def is_velocity_available(self, tcp_state: Dict[str, Any]) -> bool:
         """检查TCP状态数据中是否包含速度信息
@@ -336,41 +432,45 @@ class TCPStateToVisualizationConverter:
         vy = tcp_state.get('vy')
         w = tcp_state.get('w')
         
-        return any(v is not None and isinstance(v, (int, float)) for v in [vx, vy, w])
+        numeric_types = _NUMERIC_TYPES
+        return type(vx) in numeric_types or type(vy) in numeric_types or type(w) in numeric_types
 
 
 # 创建默认转换器实例
 visualization_converter = TCPStateToVisualizationConverter()
 
 
-def convert_tcp_state_to_visualization_json(tcp_state: Union[Dict[str, Any], str]) -> str:
+def convert_tcp_state_to_visualization_json(tcp_state: Union[Dict[str, Any], str, bytes, bytearray]) -> str:
     """TCP状态数据转VDA5050可视化消息的便捷函数
     
     Args:
-        tcp_state: TCP状态数据，可以是字典或JSON字符串
+        tcp_state: TCP状态数据，可以是字典、JSON字符串或TCP接收到的原始字节
         
     Returns:
         VDA5050可视化消息的JSON字符串
     """
-    try:
-        if isinstance(tcp_state, str):
-            state_data = json.loads(tcp_state)
-        else:
-            state_data = tcp_state
-        
-        return visualization_converter.convert_to_json(state_data)
+    # 内部调用时多为字典，优先按精确类型判断；字符串和字节直接交给解析器，无需先解码
+    if type(tcp_state) is dict or not isinstance(tcp_state, (str, bytes, bytearray)):
+        state_data = tcp_state
+    else:
+        try:
+            state_data = _loads(tcp_state)
+        except (ValueError, TypeError) as e:
+            # orjson.JSONDecodeError与json.JSONDecodeError均为ValueError的子类
+            return _dumps_pretty({
+                "error": "JSON解析失败",
+                "message": str(e)
+            })
     
-    except json.JSONDecodeError as e:
-        return json.dumps({
-            "error": "JSON解析失败",
-            "message": str(e)
-        }, indent=2, ensure_ascii=False)
+    try:
+        visualization_msg = visualization_converter.convert_tcp_state_to_visualization_checked(state_data)
+        return _dumps_pretty(visualization_msg.get_message_dict())
     
     except Exception as e:
-        return json.dumps({
+        return _dumps_pretty({
             "error": "转换失败",
             "message": str(e)
-        }, indent=2, ensure_ascii=False)
+        })
 
 
 def create_sample_tcp_state() -> Dict[str, Any]:
@@ -12,6 +12,9 @@ from .base_message import VDA5050BaseMessage
 class AGVPosition:
     """AGV位置类"""
     
+    __slots__ = ('x', 'y', 'theta', 'map_id', 'position_initialized',
+                 'localization_score', 'deviation_range')
+    
     def __init__(self,
                  x: float,
                  y: float,
@@ -58,6 +61,8 @@ class AGVPosition:
 class Velocity:
     """速度类"""
     
+    __slots__ = ('vx', 'vy', 'omega')
+    
     def __init__(self,
                  vx: Optional[float] = None,
                  vy: Optional[float] = None,